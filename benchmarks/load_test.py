@@ -0,0 +1,404 @@
+"""Replay concurrent Dash sessions against a locally started app on the offline provider.
+
+Starts `gunicorn app:server` with the given worker and thread counts and the local price
+provider, or targets a running app with `--url`. Virtual users then add and remove tickers
+and change the visible range, posting the same `_dash-update-component` requests as the
+browser, and applying returned patches to their own figure and raw-prices stores. Reports
+p50/p95/p99 latency per callback, throughput, errors, and responses inconsistent with
+the requested tickers.
+
+Run with `python -m benchmarks.load_test --workers 2 --threads 4 --users 20`.
+"""
+
+import argparse
+import asyncio
+import copy
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.constants import APP_MAX_TICKERS
+
+TICKER_POOL = ["QQQ", "SPY", "VTI", "VT", "IWM", "EFA", "EEM", "TLT", "GLD", "VNQ", "BND", "XLK"]
+RANGE_DAYS = [30, 91, 182, 365, 1095, 1826]
+READY_TIMEOUT_SECONDS = 120
+MAX_REPORTED_INCONSISTENCIES = 10
+
+
+@dataclass
+class Results:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    inconsistencies: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def record(self, callback: str, seconds: float) -> None:
+        self.latencies.setdefault(callback, []).append(seconds)
+
+    def error(self, callback: str) -> None:
+        self.errors[callback] = self.errors.get(callback, 0) + 1
+
+
+async def http_request(url: str, method: str = "GET", payload: Any = None) -> tuple[int, Any]:
+    """Send one HTTP/1.1 request on a fresh connection and return the status and JSON body."""
+    parts = urllib.parse.urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    head = (
+        f"{method} {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    try:
+        writer.write(head.encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    header, _, content = response.partition(b"\r\n\r\n")
+    status = int(header.split(b" ", 2)[1])
+    if b"transfer-encoding: chunked" in header.lower():
+        content = _dechunk(content)
+    return status, json.loads(content) if content and status == 200 else {}
+
+
+def _dechunk(content: bytes) -> bytes:
+    chunks = []
+    while content:
+        size_line, _, content = content.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            break
+        chunks.append(content[:size])
+        content = content[size + 2 :]
+    return b"".join(chunks)
+
+
+def apply_patch(target: Any, patch: dict[str, Any]) -> Any:
+    """Apply the operations of a serialized `dash.Patch` the way the renderer does."""
+    if not isinstance(patch, dict) or "__dash_patch_update" not in patch:
+        return patch
+    for operation in patch["operations"]:
+        *path, last = operation["location"]
+        parent = target
+        for key in path:
+            parent = parent[key]
+        params = operation["params"]
+        kind = operation["operation"]
+        if kind == "Assign":
+            parent[last] = params["value"]
+        elif kind == "Delete":
+            del parent[last]
+        elif kind == "Insert":
+            parent[last].insert(params["index"], params["value"])
+        elif kind == "Append":
+            parent[last].append(params["value"])
+        elif kind == "Remove":
+            parent[last].remove(params["value"])
+        else:
+            raise ValueError(f"Unsupported patch operation: {kind}")
+    return target
+
+
+def find_component(node: Any, component_id: str) -> dict[str, Any] | None:
+    """Return the layout component with the id, searching its children depth-first."""
+    if isinstance(node, list):
+        return next(filter(None, (find_component(n, component_id) for n in node)), None)
+    if isinstance(node, dict):
+        props = node.get("props", {})
+        if props.get("id") == component_id:
+            return node
+        return next(filter(None, (find_component(v, component_id) for v in props.values())), None)
+    return None
+
+
+def parse_outputs(output: str) -> list[dict[str, str]]:
+    """Return the outputs of a dependency, e.g. `..a.figure@h...b.data..`, as id/property."""
+    outputs = []
+    for part in output.strip(".").split("..."):
+        component_id, _, prop = part.rpartition(".")
+        outputs.append({"id": component_id, "property": prop.split("@")[0]})
+    return outputs
+
+
+class Callbacks:
+    """Request bodies of the server callbacks fired by ticker and range changes."""
+
+    def __init__(self, dependencies: list[dict[str, Any]]) -> None:
+        def find(output_id: str, input_id: str) -> dict[str, Any]:
+            return next(
+                d
+                for d in dependencies
+                if output_id in d["output"] and any(i["id"] == input_id for i in d["inputs"])
+            )
+
+        self.specs = {
+            "update_tickers": find("ticker-selection.options", "ticker-selection"),
+            "on_tickers_change": find("raw-prices.data", "ticker-selection"),
+            "update_window_views": find("stats-table.data", "visible-range"),
+        }
+
+    def body(self, name: str, inputs: list[Any], state: list[Any], changed: str) -> dict[str, Any]:
+        spec = self.specs[name]
+        return {
+            "output": spec["output"],
+            "outputs": parse_outputs(spec["output"]),
+            "inputs": [{**i, "value": v} for i, v in zip(spec["inputs"], inputs)],
+            "state": [{**s, "value": v} for s, v in zip(spec["state"], state)],
+            "changedPropIds": [changed],
+        }
+
+
+class VirtualUser:
+    """One browser session holding its own figure, raw-prices and visible-range stores."""
+
+    def __init__(
+        self,
+        url: str,
+        callbacks: Callbacks,
+        layout: dict[str, Any],
+        results: Results,
+        rng: random.Random,
+    ) -> None:
+        self.url = url
+        self.callbacks = callbacks
+        self.results = results
+        self.rng = rng
+        # patches are applied in place, every user keeps its own copy of the stores
+        self.figure = copy.deepcopy(_props(layout, "plotly-normalized-asset-prices")["figure"])
+        self.raw_prices = copy.deepcopy(_props(layout, "raw-prices")["data"])
+        self.visible_range = _props(layout, "visible-range")["data"]
+        self.tickers = list(_props(layout, "ticker-selection")["value"])
+
+    async def post(self, name: str, body: dict[str, Any]) -> dict[str, Any] | None:
+        t0 = time.perf_counter()
+        try:
+            status, response = await http_request(
+                f"{self.url}/_dash-update-component", "POST", body
+            )
+        except (OSError, ValueError):
+            status, response = 0, {}
+        self.results.record(name, time.perf_counter() - t0)
+        if status not in (200, 204):
+            self.results.error(name)
+            return None
+        return response.get("response", {})
+
+    def check(self, condition: bool, message: str) -> None:
+        if not condition:
+            self.results.inconsistencies.append(message)
+
+    async def change_tickers(self, tickers: list[str]) -> None:
+        """Fire the callbacks of a ticker selection change concurrently, like the browser."""
+        cb = self.callbacks
+        responses = await asyncio.gather(
+            self.post(
+                "update_tickers",
+                cb.body(
+                    "update_tickers",
+                    [None, tickers],
+                    ["", self.tickers],
+                    "ticker-selection.value",
+                ),
+            ),
+            self.post(
+                "on_tickers_change",
+                cb.body(
+                    "on_tickers_change",
+                    [tickers],
+                    [self.figure, self.raw_prices],
+                    "ticker-selection.value",
+                ),
+            ),
+            self.post(
+                "update_window_views",
+                cb.body(
+                    "update_window_views",
+                    [self.visible_range, tickers],
+                    [],
+                    "ticker-selection.value",
+                ),
+            ),
+        )
+        self.tickers = tickers
+        selection, figure, views = responses
+        if selection:
+            value = selection.get("ticker-selection", {}).get("value")
+            self.check(value == tickers, f"selection {value} != {tickers}")
+        if figure:
+            self.figure = apply_patch(
+                self.figure, figure["plotly-normalized-asset-prices"]["figure"]
+            )
+            self.raw_prices = apply_patch(self.raw_prices, figure["raw-prices"]["data"])
+            names = [t.get("name") for t in self.figure["data"] if t.get("yaxis") == "y2"]
+            self.check(names == tickers, f"figure traces {names} != {tickers}")
+            self.check(
+                len(self.figure["data"]) == 2 * len(tickers),
+                f"figure has {len(self.figure['data'])} traces for {tickers}",
+            )
+            self.check(
+                self.raw_prices["tickers"] == tickers
+                and set(self.raw_prices["prices"]) == set(tickers),
+                f"raw prices {self.raw_prices['tickers']} != {tickers}",
+            )
+        if views:
+            self.check_views(views, tickers)
+
+    async def change_range(self) -> None:
+        end = self.visible_range[1]
+        days = self.rng.choice(RANGE_DAYS)
+        start = f"{datetime.date.fromisoformat(end[:10]) - datetime.timedelta(days):%Y-%m-%d}"
+        self.visible_range = [start, end]
+        body = self.callbacks.body(
+            "update_window_views", [self.visible_range, self.tickers], [], "visible-range.data"
+        )
+        views = await self.post("update_window_views", body)
+        if views:
+            self.check_views(views, self.tickers)
+
+    def check_views(self, views: dict[str, Any], tickers: list[str]) -> None:
+        rows = [row["ticker"] for row in views["stats-table"]["data"]]
+        self.check(rows == tickers, f"stats rows {rows} != {tickers}")
+        heatmap = views["correlation-heatmap"]["figure"]["data"]
+        labels = heatmap[0]["x"] if heatmap else []
+        self.check(list(labels) == tickers, f"heatmap labels {labels} != {tickers}")
+
+    def next_tickers(self) -> list[str]:
+        tickers = list(self.tickers)
+        others = [t for t in TICKER_POOL if t not in tickers]
+        if tickers and (len(tickers) >= APP_MAX_TICKERS or not others or self.rng.random() < 0.4):
+            tickers.remove(self.rng.choice(tickers))
+        else:
+            tickers.append(self.rng.choice(others))
+        return tickers
+
+    async def run(self, n_actions: int, think_ms: float) -> None:
+        for _ in range(n_actions):
+            if self.rng.random() < 0.5:
+                await self.change_tickers(self.next_tickers())
+            else:
+                await self.change_range()
+            if think_ms:
+                await asyncio.sleep(self.rng.expovariate(1000 / think_ms))
+
+
+def _props(layout: dict[str, Any], component_id: str) -> dict[str, Any]:
+    component = find_component(layout, component_id)
+    if component is None:
+        raise ValueError(f"No component {component_id} in the layout")
+    return component["props"]
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def wait_ready(url: str) -> dict[str, Any]:
+    """Return the layout once the app serves its initial views, not the warm-up placeholders."""
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while True:
+        try:
+            status, layout = await http_request(f"{url}/_dash-layout")
+            if status == 200 and _props(layout, "raw-prices")["data"] is not None:
+                return layout
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{url} not ready after {READY_TIMEOUT_SECONDS}s")
+        await asyncio.sleep(0.5)
+
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    """Start gunicorn with the offline price provider in the repository root."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "app:server",
+        f"--workers={workers}",
+        f"--threads={threads}",
+        f"--bind=127.0.0.1:{port}",
+    ]
+    env = {**os.environ, "PRICES_PROVIDER": "local", "LOG_SAMPLE_RATE": "0"}
+    return subprocess.Popen(command, cwd=root, env=env)
+
+
+async def run_load(args: argparse.Namespace) -> Results:
+    layout = await wait_ready(args.url)
+    status, dependencies = await http_request(f"{args.url}/_dash-dependencies")
+    callbacks = Callbacks(dependencies)
+    results = Results()
+    users = [
+        VirtualUser(args.url, callbacks, layout, results, random.Random(args.seed + i))
+        for i in range(args.users)
+    ]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user.run(args.actions, args.think_ms) for user in users))
+    results.elapsed = time.perf_counter() - t0
+    return results
+
+
+def report(results: Results, args: argparse.Namespace) -> None:
+    print(
+        f"{args.users} users x {args.actions} actions, {args.workers} workers x"
+        f" {args.threads} threads, {results.elapsed:.1f}s"
+    )
+    print(
+        f"{'callback':>20} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    n_requests = 0
+    for callback, latencies in sorted(results.latencies.items()):
+        n_requests += len(latencies)
+        p50, p95, p99 = (1e3 * percentile(latencies, q) for q in (50, 95, 99))
+        errors = results.errors.get(callback, 0)
+        print(f"{callback:>20} {len(latencies):>9} {errors:>7} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+    print(f"throughput: {n_requests / results.elapsed:.1f} requests/s")
+    print(f"errors: {sum(results.errors.values())}")
+    print(f"inconsistencies: {len(results.inconsistencies)}")
+    for message in results.inconsistencies[:MAX_REPORTED_INCONSISTENCIES]:
+        print(f"  {message}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="target a running app instead of starting one")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--actions", type=int, default=20, help="actions per virtual user")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between actions")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    server = None
+    if args.url is None:
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.workers, args.threads, args.port)
+    try:
+        results = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    report(results, args)
+    if results.errors or results.inconsistencies:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare the dict figure builder of `plot_prices` against the previous graph objects path.
+
+Run offline with `python -m benchmarks.plot_prices`.
+"""
+
+import itertools
+import timeit
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+from src.cache import SeriesCache
+from src.constants import COLORS
+from src.prices import Prices
+from src.providers import LocalProvider
+from src.style_elements import plot_prices
+from src.utils import normalize_prices
+
+TICKER_COUNTS = [1, 4, 10]
+DATE_START = "2015-01-01"
+REPEATS = 5
+
+
+def plot_prices_graph_objects(
+    timestamps: pd.DatetimeIndex,
+    prices: pd.DataFrame,
+    prices_raw: pd.DataFrame,
+    rolling_changes: pd.DataFrame,
+    idx_range: tuple[int, int],
+) -> go.Figure:
+    """Previous implementation: per-trace validation and per-point formatted customdata."""
+    idx0, idx1 = idx_range
+    date_range = [timestamps[idx0], timestamps[idx1]]
+    prices_normalized = normalize_prices(prices, date_range)
+    fig = go.Figure()
+    colors = itertools.cycle(COLORS)
+    for asset in prices.columns:
+        fig.add_trace(
+            go.Scatter(
+                x=timestamps,
+                y=rolling_changes[asset],
+                line=dict(color=next(colors)),
+                xaxis="x1",
+                yaxis="y1",
+                showlegend=False,
+            )
+        )
+    colors = itertools.cycle(COLORS)
+    for asset in prices_normalized.columns:
+        y_values = 100 * prices_normalized[asset]
+        customdata = [
+            [f"{pct:+.2f}%", f"${price:,.2f}"] for pct, price in zip(y_values, prices_raw[asset])
+        ]
+        fig.add_trace(
+            go.Scatter(
+                x=timestamps,
+                y=y_values.to_numpy(),
+                customdata=customdata,
+                line=dict(width=3, color=next(colors)),
+                name=asset,
+                xaxis="x2",
+                yaxis="y2",
+                hovertemplate="<b>%{customdata[0]}</b> · %{customdata[1]}<extra></extra>",
+            )
+        )
+    fig.update_layout(
+        xaxis1=dict(rangeslider=dict(visible=True, thickness=0.1), range=date_range),
+        xaxis2=dict(matches="x1", range=date_range),
+        yaxis2=dict(autorange=True),
+        yaxis3=dict(matches="y2", overlaying="y2", side="right"),
+        template="plotly",
+        height=600,
+    )
+    return fig
+
+
+def main() -> None:
+    provider = LocalProvider()
+    print(f"{'tickers':>8} {'path':>14} {'build ms':>10} {'json ms':>10} {'json kB':>10}")
+    for n_tickers in TICKER_COUNTS:
+        tickers = [f"T{i:02d}" for i in range(n_tickers)]
+        prices = Prices(tickers, DATE_START, provider=provider, store=SeriesCache())
+        args = (
+            prices.date_range,
+            prices.prices_normalized,
+            prices.prices_raw,
+            prices.rolling_changes,
+            (len(prices.date_range) - 252, len(prices.date_range) - 1),
+        )
+        for name, build in [("graph_objects", plot_prices_graph_objects), ("dict", plot_prices)]:
+            fig = build(*args)
+            build_ms = 1e3 * min(timeit.repeat(lambda: build(*args), number=1, repeat=REPEATS))
+            json_ms = 1e3 * min(
+                timeit.repeat(lambda: to_json_plotly(fig), number=1, repeat=REPEATS)
+            )
+            json_kb = len(to_json_plotly(fig)) / 1024
+            print(f"{n_tickers:>8} {name:>14} {build_ms:>10.1f} {json_ms:>10.1f} {json_kb:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
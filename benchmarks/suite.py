@@ -0,0 +1,209 @@
+"""Time and peak memory of the `Prices` and plotting hot paths on synthetic price panels.
+
+Sweeps ticker counts and history lengths of daily prices, plus intraday intervals, with the
+offline `LocalProvider`. The store is warmed before measuring, so the stages time the work
+done per session rather than the generation of the synthetic prices.
+
+Run offline with `python -m benchmarks.suite`, save results with `--save results.json` and
+compare against saved results with `--baseline results.json`, which exits with status 1
+when a stage got slower than `--threshold` times its baseline time.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from src.cache import SeriesCache
+from src.dash_app import NormalizedAssetPricesApp
+from src.prices import Prices
+from src.providers import LocalProvider
+from src.style_elements import plot_prices
+
+TICKER_COUNTS = [1, 5, 10, 25, 50]
+HISTORY_YEARS = [1, 5, 10, 30]
+INTRADAY_INTERVALS = ["1h", "15m", "5m", "1m"]
+INTRADAY_YEARS = 1
+REPEATS = 5
+REGRESSION_THRESHOLD = 1.2
+ADDED_TICKER = "ADDED"
+
+Stage = tuple[Callable[[], Any], Callable[[], Any] | None]
+
+
+def measure(run: Callable[[], Any], setup: Callable[[], Any] | None, repeats: int) -> dict:
+    """Return the min and median time of `run` in ms and its peak traced memory in kB."""
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        run()
+        times.append(1e3 * (time.perf_counter() - t0))
+
+    # traced separately, tracing slows down allocations
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min_ms": min(times), "median_ms": statistics.median(times), "peak_kb": peak / 1024}
+
+
+def stages(prices: Prices) -> dict[str, Stage]:
+    """Return the stages to measure on a session holding the tickers of `prices`."""
+    tickers = list(prices.tickers)
+    n_rows = len(prices.date_range)
+    idx_range = (n_rows - max(2, n_rows // 4), n_rows - 1)
+    date_range = [prices.date_range[idx_range[0]], prices.date_range[idx_range[1]]]
+    # what the app reads on every ticker change: the view key, the cached prices it is over
+    session = SimpleNamespace(cache=prices.store, date_start=prices.date_start)
+
+    def read_through() -> str | None:
+        Prices(tickers, prices.date_start, prices.provider, prices.store, interval=prices.interval)
+        return NormalizedAssetPricesApp._view_key(session, tickers, date_range)  # type: ignore
+
+    def build_figure() -> dict[str, Any]:
+        return plot_prices(
+            prices.date_range,
+            prices.prices_normalized,
+            prices.prices_raw,
+            prices.rolling_changes,
+            idx_range,
+        )
+
+    fig = build_figure()
+    return {
+        "get_relative_prices": (lambda: prices.get_relative_prices(tickers), None),
+        "add_ticker": (
+            lambda: prices.add_ticker(ADDED_TICKER),
+            lambda: prices.update_tickers(tickers),
+        ),
+        "remove_ticker": (
+            lambda: prices.remove_ticker(ADDED_TICKER),
+            lambda: prices.update_tickers(tickers + [ADDED_TICKER]),
+        ),
+        "read_through": (read_through, None),
+        "plot_prices": (build_figure, lambda: prices.get_relative_prices(tickers)),
+        "raw_prices_payload": (
+            lambda: NormalizedAssetPricesApp._raw_prices_payload(prices),
+            None,
+        ),
+        "figure_json": (lambda: to_json_plotly(fig), None),
+    }
+
+
+def cases(
+    ticker_counts: list[int], history_years: list[int], intervals: list[str]
+) -> list[tuple[str, int, str, str]]:
+    """Return (name, ticker count, start date, interval) of the panels to sweep."""
+    today = pd.Timestamp.today().normalize()
+    sweep = []
+    for n_tickers in ticker_counts:
+        for years in history_years:
+            date_start = f"{today - pd.DateOffset(years=years):%Y-%m-%d}"
+            sweep.append((f"{n_tickers}t-{years}y-1d", n_tickers, date_start, "1d"))
+        for interval in intervals:
+            date_start = f"{today - pd.DateOffset(years=INTRADAY_YEARS):%Y-%m-%d}"
+            sweep.append(
+                (f"{n_tickers}t-{INTRADAY_YEARS}y-{interval}", n_tickers, date_start, interval)
+            )
+    return sweep
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, dict[str, dict]]:
+    provider = LocalProvider()
+    results: dict[str, dict[str, dict]] = {}
+    for name, n_tickers, date_start, interval in cases(args.tickers, args.years, args.intervals):
+        tickers = [f"T{i:02d}" for i in range(n_tickers)]
+        store = SeriesCache()
+        # warm the store with every ticker the stages read
+        Prices(tickers + [ADDED_TICKER], date_start, provider, store, interval=interval)
+        prices = Prices(tickers, date_start, provider, store, interval=interval)
+        results[name] = {}
+        for stage, (run, setup) in stages(prices).items():
+            if args.stages and stage not in args.stages:
+                continue
+            results[name][stage] = measure(run, setup, args.repeats)
+            results[name][stage]["rows"] = len(prices.date_range)
+            print_row(name, stage, results[name][stage], args.baseline_results)
+    return results
+
+
+def print_row(case: str, stage: str, result: dict, baseline: dict | None) -> None:
+    row = (
+        f"{case:>14} {stage:>20} {result['rows']:>7} {result['min_ms']:>10.2f}"
+        f" {result['median_ms']:>10.2f} {result['peak_kb']:>10.0f}"
+    )
+    previous = (baseline or {}).get(case, {}).get(stage)
+    if previous:
+        row += f" {result['min_ms'] / previous['min_ms']:>8.2f}x"
+    print(row, flush=True)
+
+
+def regressions(
+    results: dict[str, dict[str, dict]], baseline: dict[str, dict[str, dict]], threshold: float
+) -> list[str]:
+    """Return the stages whose min time exceeds threshold times their baseline min time."""
+    slower = []
+    for case, case_results in results.items():
+        for stage, result in case_results.items():
+            previous = baseline.get(case, {}).get(stage)
+            if previous and result["min_ms"] > threshold * previous["min_ms"]:
+                slower.append(
+                    f"{case} {stage}: {previous['min_ms']:.2f} -> {result['min_ms']:.2f} ms"
+                )
+    return slower
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=TICKER_COUNTS)
+    parser.add_argument("--years", type=int, nargs="+", default=HISTORY_YEARS)
+    parser.add_argument("--intervals", nargs="*", default=INTRADAY_INTERVALS)
+    parser.add_argument("--stages", nargs="*", help="only measure these stages")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    args.baseline_results = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            args.baseline_results = json.load(f)
+
+    header = (
+        f"{'case':>14} {'stage':>20} {'rows':>7} {'min ms':>10} {'median ms':>10} {'peak kB':>10}"
+    )
+    print(header + (f" {'vs base':>9}" if args.baseline_results else ""))
+    results = run_suite(args)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline_results:
+        slower = regressions(results, args.baseline_results, args.threshold)
+        if slower:
+            print(f"\n{len(slower)} stages slower than {args.threshold}x the baseline:")
+            print("\n".join(slower))
+            sys.exit(1)
+        print(f"\nNo stage slower than {args.threshold}x the baseline")
+
+
+if __name__ == "__main__":
+    main()
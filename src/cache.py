@@ -0,0 +1,174 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterator
+from contextlib import contextmanager
+from typing import Generic, TypeVar
+
+import pandas as pd
+
+from src.metrics import metrics
+from src.store import PriceStore
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+TTL_SWEEP_MIN_SIZE = 64
+
+
+class SeriesCache:
+    """Thread-safe in-memory cache of per-ticker close prices shared between sessions.
+
+    Exposes the same `load`/`save` interface as `PriceStore` so that `Prices` can read
+    through it, and writes back to the optional persistent store underneath. Cached series
+    are never modified in place: `save` replaces the whole entry, so readers can use the
+    returned series without holding the lock. Prices saved to the store are kept as
+    memory-mapped views of the store files, so worker processes sharing one store directory
+    also share the memory that holds them. Every entry put in memory gets a new generation,
+    so views derived from cached prices can be addressed by the generations they read.
+    """
+
+    def __init__(self, store: PriceStore | None = None) -> None:
+        self.store = store
+        self.yields: dict[str, float] = {}
+        self._series: dict[tuple[str, str], tuple[pd.Series, tuple[pd.Timestamp, pd.Timestamp]]] = (
+            {}
+        )
+        self._generations: dict[tuple[str, str], int] = {}
+        self._next_generation = itertools.count()
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"SeriesCache(series={sorted(self._series)}, store={self.store})"
+
+    def load(
+        self, ticker: str, interval: str = "1d"
+    ) -> tuple[pd.Series, tuple[pd.Timestamp, pd.Timestamp]] | None:
+        with self._lock:
+            cached = self._series.get((ticker, interval))
+        metrics.inc(
+            "cache_requests_total", cache="series", result="miss" if cached is None else "hit"
+        )
+        if cached is None and self.store is not None:
+            cached = self.store.load(ticker, interval)
+            metrics.inc(
+                "cache_requests_total", cache="store", result="miss" if cached is None else "hit"
+            )
+            if cached is not None:
+                with self._lock:
+                    if (ticker, interval) not in self._series:
+                        self._put((ticker, interval), cached)
+                    cached = self._series[(ticker, interval)]
+        return cached
+
+    def generations(self, tickers: list[str], interval: str = "1d") -> list[int | None]:
+        """Return the generations of the cached prices of the tickers, None if not in memory."""
+        with self._lock:
+            return [self._generations.get((ticker, interval)) for ticker in tickers]
+
+    def _put(
+        self,
+        key: tuple[str, str],
+        cached: tuple[pd.Series, tuple[pd.Timestamp, pd.Timestamp]],
+    ) -> None:
+        self._series[key] = cached
+        self._generations[key] = next(self._next_generation)
+
+    @contextmanager
+    def lock(self, tickers: list[str], interval: str = "1d") -> Iterator[None]:
+        """Lock the tickers in the store and drop them from memory to see other workers' data."""
+        if self.store is None:
+            yield
+            return
+        with self.store.lock(tickers, interval):
+            with self._lock:
+                for ticker in tickers:
+                    self._series.pop((ticker, interval), None)
+                    self._generations.pop((ticker, interval), None)
+            yield
+
+    def save(
+        self,
+        ticker: str,
+        series: pd.Series,
+        covered: tuple[pd.Timestamp, pd.Timestamp],
+        interval: str = "1d",
+    ) -> None:
+        series = series.dropna().sort_index()
+        with self._lock:
+            self._put((ticker, interval), (series, covered))
+        if self.store is not None:
+            self.store.save(ticker, series, covered, interval)
+            stored = self.store.load(ticker, interval)
+            if stored is not None:
+                with self._lock:
+                    self._put((ticker, interval), stored)
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe mapping whose entries expire after a per-entry time to live.
+
+    Expired entries are dropped when looked up, and swept on `set` whenever the mapping has
+    doubled in size since the last sweep, so keys that are never looked up again do not pile up.
+    """
+
+    def __init__(self, name: str = "ttl") -> None:
+        self.name = name
+        self._entries: dict[K, tuple[V, float]] = {}
+        self._sweep_size = TTL_SWEEP_MIN_SIZE
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Return the value of the key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[1]:
+                del self._entries[key]
+                entry = None
+        metrics.inc(
+            "cache_requests_total", cache=self.name, result="miss" if entry is None else "hit"
+        )
+        return None if entry is None else entry[0]
+
+    def set(self, key: K, value: V, ttl: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + ttl)
+            if len(self._entries) >= self._sweep_size:
+                self._entries = {k: e for k, e in self._entries.items() if now < e[1]}
+                self._sweep_size = max(TTL_SWEEP_MIN_SIZE, 2 * len(self._entries))
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe mapping that evicts the least recently used entries beyond maxsize."""
+
+    def __init__(self, maxsize: int, name: str = "lru") -> None:
+        self.maxsize = maxsize
+        self.name = name
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Return the value of the key and mark it as recently used, None if it is missing."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        metrics.inc(
+            "cache_requests_total", cache=self.name, result="miss" if value is None else "hit"
+        )
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
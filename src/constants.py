@@ -1,12 +1,59 @@
+import os
+
 APP_INITIAL_TICKERS = ["QQQ", "SPY", "VTI", "VT"]
 APP_DATE_START = "2020-01-01"
 APP_INITIAL_INTERVAL_DAYS = 365
 APP_MAX_TICKERS = 10
+APP_RAW_PRICES_DTYPE = "float64"  # "float32" halves the raw-prices payload
+APP_RELAYOUT_DEBOUNCE_MS = 100  # quiet time after the last relayout event before rescaling
+APP_RELAYOUT_MAX_WAIT_MS: int | None = None  # also rescale this often during long drags
+APP_WARM_START = True  # serve placeholders while the initial tickers load in the background
+APP_WARMUP_POLL_MS = 500  # how often placeholders check whether the initial views are ready
+APP_WARMUP_RETRY_SECONDS = 30  # wait before retrying a failed warm-up
+APP_REFRESH_SECONDS = 60  # how often the initial views look for newly completed bars
+APP_VIEW_CACHE_SIZE = 64  # gzipped figure and raw-prices responses kept for repeat views
+APP_VIEW_CACHE_COMPRESSLEVEL = 6
+APP_PANEL_CACHE_SIZE = 16  # session prices kept with their metrics for recent selections
 
-PRICES_RETRIEVAL_INTERVAL = "1d"
+PRICES_PROVIDER = os.environ.get("PRICES_PROVIDER", "yfinance")  # "yfinance" or "local"
+PRICES_FIXTURES_DIR = os.environ.get("PRICES_FIXTURES_DIR")  # csv/parquet for "local"
+PRICES_RETRIEVAL_INTERVAL = "1d"  # or intraday, e.g. "5m", for the most recent days
+PRICES_INTRADAY_LOOKBACK_DAYS = {  # business days of intraday bars, older ones are daily
+    "1m": 5,
+    "2m": 20,
+    "5m": 20,
+    "15m": 40,
+    "30m": 40,
+    "60m": 120,
+    "90m": 40,
+    "1h": 120,
+}
+PRICES_EXCHANGE_TIMEZONE = "America/New_York"
+PRICES_SESSION_OPEN = "9h30min"
+PRICES_SESSION_CLOSE = "16h"
+PRICES_AUTO_ADJUST = True  # account for dividends
+PRICES_RESCALE_RTOL = 1e-5  # change of a stored close that means the history was rescaled
 PRICES_EPS = 1e-6
+PRICES_STORAGE_DTYPE = "float64"  # "float32" halves the memory of prices kept per session
 PRICES_ROLLING_WINDOW = 251
 PRICES_ROLLING_MIN_PERIOD = 1
+PRICES_ROLLING_PERIOD = "365D"  # time-based rolling window for intraday intervals
+PRICES_VALID_TICKER_TTL = 24 * 60 * 60  # seconds to remember that a ticker is valid
+PRICES_INVALID_TICKER_TTL = 60 * 60  # seconds to remember that a ticker is not valid
+PRICES_SYMBOL_PREFILTER = False  # reject tickers missing from the nasdaqtrader directory
+PRICES_MAX_WORKERS = 8  # concurrent yield lookups
+PRICES_STORE_DIR = ".prices"  # set to None to disable the on-disk price store
+
+PLOT_MAX_POINTS = 1000  # per trace, about the pixel width of the plot
+
+STATS_BENCHMARK_TICKER = "SPY"  # beta and correlation of the selected tickers against it
+STATS_RISK_FREE_RATE = 0.0  # annual rate subtracted from returns in the Sharpe ratio
+STATS_STREAMING_MAX_ROWS = 10  # window moves up to this many rows update the previous one
+STATS_ENGINE_CACHE_SIZE = 32  # covariance engines kept for recent ticker selections
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"  # served on /metrics
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))  # of routine events logged
 
 COLORS = [
     "#4488FF",
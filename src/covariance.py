@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+
+from src.constants import STATS_STREAMING_MAX_ROWS
+
+
+class CovarianceEngine:
+    """Covariance and correlation matrices of returns over arbitrary windows of rows.
+
+    Cumulative sums and cumulative cross-product sums of the returns turn the sums over
+    any window into two O(N^2) differences, regardless of the window length. They hold
+    rows x N^2 floats and are only built when needed: the first window is summed directly
+    and a window that moved by at most `max_streaming_rows` rows from the previous one is
+    updated by adding and removing the cross products of the rows that entered and left it.
+
+    Windows (idx0, idx1] are given by the rows of prices at their ends, where row i of
+    the returns is the change from row i - 1 to row i.
+    """
+
+    def __init__(self, returns: np.ndarray, max_streaming_rows: int = STATS_STREAMING_MAX_ROWS):
+        self.returns = np.asarray(returns, dtype=np.float64)
+        self.max_streaming_rows = max_streaming_rows
+        self.computed = 0
+        self.streamed = 0
+        self.differenced = 0
+        self._sums: np.ndarray | None = None
+        self._cross_sums: np.ndarray | None = None
+        self._window: tuple[int, int] | None = None
+        self._window_sums: tuple[np.ndarray, np.ndarray] | None = None
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"CovarianceEngine(shape={self.returns.shape}, prefix={self._sums is not None})"
+
+    def _rows_sums(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        rows = self.returns[start:stop]
+        return rows.sum(axis=0), rows.T @ rows
+
+    def _prefix_sums(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        if self._sums is None or self._cross_sums is None:
+            n_rows, n_columns = self.returns.shape
+            self._sums = np.zeros((n_rows + 1, n_columns))
+            np.cumsum(self.returns, axis=0, out=self._sums[1:])
+            self._cross_sums = np.zeros((n_rows + 1, n_columns, n_columns))
+            np.cumsum(
+                self.returns[:, :, None] * self.returns[:, None, :],
+                axis=0,
+                out=self._cross_sums[1:],
+            )
+        return (
+            self._sums[stop] - self._sums[start],
+            self._cross_sums[stop] - self._cross_sums[start],
+        )
+
+    def _streamed_sums(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return the sums of the window updated from the previous one, None if it moved far."""
+        if self._window is None or self._window_sums is None:
+            return None
+        prev_start, prev_stop = self._window
+        if abs(start - prev_start) + abs(stop - prev_stop) > self.max_streaming_rows:
+            return None
+        sums, cross_sums = (sums.copy() for sums in self._window_sums)
+        for (lo, hi), sign in (
+            (sorted((prev_start, start)), 1 if start < prev_start else -1),
+            (sorted((prev_stop, stop)), 1 if stop > prev_stop else -1),
+        ):
+            if lo < hi:
+                rows_sums, rows_cross_sums = self._rows_sums(lo, hi)
+                sums += sign * rows_sums
+                cross_sums += sign * rows_cross_sums
+        return sums, cross_sums
+
+    def _window_sums_of(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            window_sums = self._streamed_sums(start, stop)
+            if window_sums is not None:
+                self.streamed += 1
+            elif self._window is None:
+                window_sums = self._rows_sums(start, stop)
+                self.computed += 1
+            else:
+                window_sums = self._prefix_sums(start, stop)
+                self.differenced += 1
+            self._window, self._window_sums = (start, stop), window_sums
+            return window_sums
+
+    def covariance(self, idx0: int, idx1: int) -> np.ndarray:
+        """Return the sample covariance matrix of the returns in the window (idx0, idx1]."""
+        n_rows, n_columns = self.returns.shape
+        start, stop = idx0 % n_rows + 1, idx1 % n_rows + 1
+        n = stop - start
+        if n < 2:
+            return np.full((n_columns, n_columns), np.nan)
+        sums, cross_sums = self._window_sums_of(start, stop)
+        return (cross_sums - np.outer(sums, sums) / n) / (n - 1)
+
+    def correlation(self, idx0: int, idx1: int) -> np.ndarray:
+        """Return the correlation matrix of the returns in the window (idx0, idx1]."""
+        covariance = self.covariance(idx0, idx1)
+        std = np.sqrt(np.diag(covariance))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return covariance / np.outer(std, std)
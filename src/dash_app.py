@@ -1,34 +1,109 @@
+import gzip
+import hashlib
 import json
+import logging
+import threading
+import time
 from collections.abc import Sequence
 from typing import Any
 
-from dash import Dash, Input, Output, State, ctx, dcc, html, no_update
-from plotly.graph_objects import Figure
+import numpy as np
+from dash import Dash, Input, Output, Patch, State, ctx, dcc, html, no_update
+from flask import Response, g, request
+from plotly.io.json import to_json_plotly
 
+from src.cache import LRUCache, SeriesCache
 from src.constants import (
     APP_DATE_START,
     APP_INITIAL_INTERVAL_DAYS,
     APP_INITIAL_TICKERS,
     APP_MAX_TICKERS,
+    APP_PANEL_CACHE_SIZE,
+    APP_RAW_PRICES_DTYPE,
+    APP_REFRESH_SECONDS,
+    APP_RELAYOUT_DEBOUNCE_MS,
+    APP_RELAYOUT_MAX_WAIT_MS,
+    APP_VIEW_CACHE_COMPRESSLEVEL,
+    APP_VIEW_CACHE_SIZE,
+    APP_WARM_START,
+    APP_WARMUP_POLL_MS,
+    APP_WARMUP_RETRY_SECONDS,
+    COLORS,
+    PLOT_MAX_POINTS,
+    PRICES_RETRIEVAL_INTERVAL,
+    STATS_BENCHMARK_TICKER,
+    STATS_ENGINE_CACHE_SIZE,
 )
+from src.covariance import CovarianceEngine
+from src.metrics import SIZE_BUCKETS, log_event, metrics, setup_logging
 from src.prices import Prices
+from src.providers import get_provider
+from src.sessions import trading_index
+from src.store import get_price_store
 from src.style_elements import (
     BUTTON_STYLE_ACTIVE,
     BUTTON_STYLE_INACTIVE,
+    plot_correlations,
+    plot_placeholder,
     plot_prices,
+    plot_traces,
     setup_interval_buttons,
+    setup_stats_table,
     setup_ticker_selection,
 )
 from src.utils import (
     adjust_date_range,
     date_to_idx_range,
+    encode_array,
     get_date_range,
     normalize_ticker_symbol,
+    normalize_tickers,
 )
 
 INTERVAL_LENGTH_TOLERANCE_DAYS = 2
 
 _JS_HELPERS = """
+    function _decodeArray(b64, dtype) {
+        const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+        return dtype === 'float32' ? new Float32Array(bytes.buffer) : new Float64Array(bytes.buffer);
+    }
+    function _cached(key, source, decode) {
+        // decoded arrays live on window across callbacks, keyed by their base64 source
+        const cache = window._rawPricesCache || (window._rawPricesCache = new Map());
+        const hit = cache.get(key);
+        if (hit && hit.source === source) return hit.value;
+        const value = decode(source);
+        cache.set(key, {source: source, value: value});
+        return value;
+    }
+    function _decodeRawPrices(rawPrices) {
+        const cal = rawPrices.calendar;
+        let tsMs;
+        if (cal.freq === 'B') {
+            tsMs = _cached('calendar', 'B:' + cal.start_ms + ':' + cal.length, () => {
+                const days = new Float64Array(cal.length);
+                let t = cal.start_ms;
+                for (let i = 0; i < cal.length; t += 86400000) {
+                    const day = new Date(t).getUTCDay();
+                    if (day !== 0 && day !== 6) days[i++] = t;
+                }
+                return days;
+            });
+        } else {
+            tsMs = _cached('calendar', cal.timestamps_ms, b64 => _decodeArray(b64, 'float64'));
+        }
+        const prices = {};
+        for (const t of rawPrices.tickers) {
+            prices[t] = _cached(
+                'prices:' + t, rawPrices.prices[t], b64 => _decodeArray(b64, rawPrices.dtype));
+        }
+        for (const key of window._rawPricesCache.keys()) {
+            if (key.startsWith('prices:') && !(key.slice(7) in prices)) {
+                window._rawPricesCache.delete(key);
+            }
+        }
+        return {timestamps_ms: tsMs, tickers: rawPrices.tickers, prices: prices};
+    }
     function _nearestIdx(tsMs, t) {
         let lo = 0, hi = tsMs.length - 1;
         if (t <= tsMs[lo]) return lo;
@@ -44,23 +119,92 @@ _JS_HELPERS = """
         const y = d.getUTCFullYear();
         const m = String(d.getUTCMonth() + 1).padStart(2, '0');
         const day = String(d.getUTCDate()).padStart(2, '0');
-        return y + '-' + m + '-' + day;
+        const date = y + '-' + m + '-' + day;
+        if (ms % 86400000 === 0) return date;
+        const hh = String(d.getUTCHours()).padStart(2, '0');
+        const mm = String(d.getUTCMinutes()).padStart(2, '0');
+        return date + ' ' + hh + ':' + mm;
+    }
+    function _parseDate(s) {
+        // plotly dates are naive, read them as UTC like the timestamps of the raw prices
+        s = String(s);
+        return s.length <= 10 ? Date.parse(s) : Date.parse(s.slice(0, 19).replace(' ', 'T') + 'Z');
     }
     function _getDateRange(layout) {
         const r2 = layout && layout.xaxis2 && layout.xaxis2.range;
-        if (r2 && r2[0] && r2[1]) return [String(r2[0]).slice(0, 10), String(r2[1]).slice(0, 10)];
+        if (r2 && r2[0] && r2[1]) return [String(r2[0]), String(r2[1])];
         const r1 = layout && layout.xaxis && layout.xaxis.range;
-        if (r1 && r1[0] && r1[1]) return [String(r1[0]).slice(0, 10), String(r1[1]).slice(0, 10)];
+        if (r1 && r1[0] && r1[1]) return [String(r1[0]), String(r1[1])];
         return [null, null];
     }
-    function _rescale(figure, rawPrices, d0, d1) {
+    function _maxPoints(fallback) {
+        const el = document.getElementById('plotly-normalized-asset-prices');
+        return (el && el.clientWidth) ? Math.max(el.clientWidth, 100) : fallback;
+    }
+    function _lttb(xs, ys, i0, i1, nOut, idx) {
+        // Largest-Triangle-Three-Buckets over [i0, i1], same buckets as src/downsample.py;
+        // writes the kept indices into idx and returns their count
+        const n = i1 - i0 + 1;
+        if (n <= nOut || nOut < 3) {
+            for (let k = 0; k < n; k++) idx[k] = i0 + k;
+            return n;
+        }
+        const every = (n - 2) / (nOut - 2);
+        let a = i0;
+        idx[0] = i0;
+        for (let b = 0; b < nOut - 2; b++) {
+            const lo = i0 + 1 + Math.floor(b * every);
+            const hi = i0 + 1 + Math.floor((b + 1) * every);
+            let cx = xs[i1], cy = ys[i1];
+            if (b < nOut - 3) {
+                const nhi = i0 + 1 + Math.floor((b + 2) * every);
+                cx = 0; cy = 0;
+                for (let j = hi; j < nhi; j++) { cx += xs[j]; cy += ys[j]; }
+                cx /= nhi - hi; cy /= nhi - hi;
+            }
+            let best = lo, maxArea = -1;
+            for (let j = lo; j < hi; j++) {
+                const area = Math.abs(
+                    (xs[a] - cx) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (cy - ys[a]));
+                if (area > maxArea) { maxArea = area; best = j; }
+            }
+            idx[b + 1] = best;
+            a = best;
+        }
+        idx[nOut - 1] = i1;
+        return nOut;
+    }
+    function _traceBuffers(i, size) {
+        // typed arrays of each trace are reused across relayouts and only grow
+        const all = window._traceBuffers || (window._traceBuffers = []);
+        let buf = all[i];
+        if (!buf || buf.idx.length < size) {
+            buf = all[i] = {
+                idx: new Int32Array(size),
+                x: new Float64Array(size),
+                y: new Float64Array(size),
+                raw: new Float64Array(size),
+            };
+        }
+        return buf;
+    }
+    function _arrayToJSON() {
+        return Array.from(this);
+    }
+    function _view(array, n) {
+        // a fresh view lets plotly see the change, toJSON keeps figure states plain lists
+        const view = array.subarray(0, n);
+        view.toJSON = _arrayToJSON;
+        return view;
+    }
+    function _rescale(figure, rawPrices, d0, d1, maxPoints) {
         const tsMs = rawPrices.timestamps_ms;
         const tickers = rawPrices.tickers;
         const prices = rawPrices.prices;
         const N = tickers.length;
         if (!N) return figure;
-        const idx0 = _nearestIdx(tsMs, Date.parse(d0));
-        const idx1 = _nearestIdx(tsMs, Date.parse(d1));
+        const idx0 = _nearestIdx(tsMs, _parseDate(d0));
+        const idx1 = _nearestIdx(tsMs, _parseDate(d1));
         const newFig = Object.assign({}, figure);
         newFig.data = figure.data.slice();
         newFig.layout = Object.assign({}, figure.layout);
@@ -69,28 +213,28 @@ _JS_HELPERS = """
         const y2 = Object.assign({}, figure.layout.yaxis2 || {}, {autorange: true});
         delete y2.range;
         newFig.layout.yaxis2 = y2;
+        const n = idx1 - idx0 + 1;
+        const size = (n <= maxPoints || maxPoints < 3) ? n : maxPoints;
         for (let i = 0; i < N; i++) {
             const p = prices[tickers[i]];
             if (!p) continue;
+            // only the visible window is plotted, at full resolution when zoomed in enough
+            const buf = _traceBuffers(i, size);
+            const kept = _lttb(tsMs, p, idx0, idx1, maxPoints, buf.idx);
             const base = p[idx0];
-            const y = new Array(p.length);
-            const cd = new Array(p.length);
-            for (let j = 0; j < p.length; j++) {
-                const price = p[j];
-                const priceStr = '$' + price.toLocaleString('en-US',
-                    {minimumFractionDigits: 2, maximumFractionDigits: 2});
-                if (j < idx0 || j > idx1) {
-                    y[j] = null;
-                    cd[j] = ['', priceStr];
-                } else {
-                    const yj = 100 * (price / base - 1);
-                    y[j] = yj;
-                    const pctStr = (yj >= 0 ? '+' : '') + yj.toFixed(2) + '%';
-                    cd[j] = [pctStr, priceStr];
-                }
+            for (let k = 0; k < kept; k++) {
+                const j = buf.idx[k];
+                buf.x[k] = tsMs[j];
+                buf.y[k] = 100 * (p[j] / base - 1);
+                buf.raw[k] = p[j];
             }
-            newFig.data[N + i] = Object.assign({}, newFig.data[N + i], {y: y, customdata: cd});
+            newFig.data[N + i] = Object.assign({}, newFig.data[N + i], {
+                x: _view(buf.x, kept),
+                y: _view(buf.y, kept),
+                customdata: _view(buf.raw, kept),
+            });
         }
+        newFig.layout.datarevision = (figure.layout.datarevision || 0) + 1;
         return newFig;
     }
 """
@@ -123,78 +267,307 @@ class NormalizedAssetPricesApp:
     def setup_env(
         self, initial_tickers: list[str], date_start: str, initial_interval_days: int
     ) -> None:
-        self.prices = Prices(initial_tickers, date_start)
-        self.timestamps = self.prices.date_range
-        self.idx_range = date_to_idx_range(
-            self.timestamps,
-            adjust_date_range(self.timestamps, initial_interval_days),
+        self.date_start = date_start
+        self.provider = get_provider()
+        self.cache = SeriesCache(get_price_store(self.provider.name))
+        self.covariances: LRUCache[tuple[Any, ...], CovarianceEngine] = LRUCache(
+            STATS_ENGINE_CACHE_SIZE, "covariance_engines"
+        )
+        self.views: LRUCache[str, bytes] = LRUCache(APP_VIEW_CACHE_SIZE, "views")
+        self.panels: LRUCache[tuple[Any, ...], Prices] = LRUCache(APP_PANEL_CACHE_SIZE, "panels")
+        self.ready = threading.Event()
+        if APP_WARM_START:
+            # serve placeholders right away and push the initial views once they are built
+            threading.Thread(
+                target=self._warm_up_in_background,
+                args=(initial_tickers, initial_interval_days),
+                name="warm-up",
+                daemon=True,
+            ).start()
+        else:
+            self.warm_up(initial_tickers, initial_interval_days)
+            threading.Thread(
+                target=self._refresh_in_background, name="refresh", daemon=True
+            ).start()
+
+    def warm_up(self, initial_tickers: list[str], initial_interval_days: int) -> None:
+        """Fetch the initial tickers and build the initial views, then mark the app ready."""
+        self.initial_interval_days = initial_interval_days
+        self.prices = self.get_prices(initial_tickers)
+        self.build_initial_views()
+        self.ready.set()
+
+    def refresh_initial_views(self) -> None:
+        """Extend the prices of the initial tickers with completed bars, rebuilding the views."""
+        if trading_index(self.date_start, PRICES_RETRIEVAL_INTERVAL)[-1] <= self.timestamps[-1]:
+            return
+        self.prices.refresh()
+        if not self.prices.date_range.equals(self.timestamps):
+            self.build_initial_views()
+
+    def build_initial_views(self) -> None:
+        """Build the landing views from the long-lived prices of the initial tickers."""
+        timestamps = self.prices.date_range
+        idx_range = date_to_idx_range(
+            timestamps, adjust_date_range(timestamps, self.initial_interval_days)
         )
-        self.fig = plot_prices(
-            self.timestamps,
+        fig = plot_prices(
+            timestamps,
             self.prices.prices_normalized,
             self.prices.prices_raw,
             self.prices.rolling_changes,
-            self.idx_range,
+            idx_range,
         )
+        date_range = get_date_range(fig["layout"])
+        stats_rows, correlation_fig = self.get_window_views(self.prices.tickers, date_range)
+        raw_prices = self._raw_prices_payload(self.prices)
+
+        # assigned only once everything is built, a failed build is retried on the next refresh
+        self.timestamps, self.idx_range, self.fig = timestamps, idx_range, fig
+        self.initial_views: dict[str, Any] = {
+            "figure": fig,
+            "raw_prices": raw_prices,
+            "visible_range": date_range,
+            "stats_rows": stats_rows,
+            "correlation_figure": correlation_fig,
+        }
+
+    def _warm_up_in_background(
+        self, initial_tickers: list[str], initial_interval_days: int
+    ) -> None:
+        while True:
+            try:
+                self.warm_up(initial_tickers, initial_interval_days)
+                break
+            except Exception as e:
+                log_event("warm_up_failed", logging.WARNING, sample_rate=1.0, error=str(e))
+                time.sleep(APP_WARMUP_RETRY_SECONDS)
+        self._refresh_in_background()
+
+    def _refresh_in_background(self) -> None:
+        # page loads keep serving the previous views while they are refreshed, or if that fails
+        while True:
+            time.sleep(APP_REFRESH_SECONDS)
+            try:
+                self.refresh_initial_views()
+            except Exception as e:
+                log_event("refresh_failed", logging.WARNING, sample_rate=1.0, error=str(e))
+
+    def get_prices(self, tickers: list[str]) -> Prices:
+        """Assemble session prices from the shared cache, fetching only what is missing."""
+        return Prices(
+            normalize_tickers(tickers),
+            self.date_start,
+            provider=self.provider,
+            store=self.cache,
+            yield_cache=self.cache.yields,
+        )
+
+    def get_panel(self, tickers: list[str]) -> Prices:
+        """Return read-only session prices of the tickers, shared by callbacks until they change.
+
+        Panels are addressed by the tickers, the time index and the generations of the cached
+        prices they were assembled from, so their memoized metrics outlive a single callback.
+        """
+        tickers = normalize_tickers(tickers)
+        timestamps = trading_index(self.date_start, PRICES_RETRIEVAL_INTERVAL)
+        generations = self.cache.generations(tickers)
+        key = (tuple(tickers), len(timestamps), timestamps[-1], tuple(generations))
+        panel = self.panels.get(key) if None not in generations else None
+        if panel is None:
+            panel = self.get_prices(tickers)
+            # only cache panels whose prices did not change while they were assembled
+            if tuple(self.cache.generations(tickers)) == key[-1]:
+                self.panels.set(key, panel)
+        return panel
 
     def update_figure(
-        self, tickers: list[str], date_range: Sequence[str | None] = [None, None]
-    ) -> Figure:
-        tickers_updated, range_updated = False, False
-
-        if list(tickers) != self.prices.tickers:
-            self.prices.update_tickers(tickers)
-            tickers_updated = True
-            print(f"tickers update: {', '.join(tickers) if tickers else 'None'}")
-
-        idx_range = date_to_idx_range(self.timestamps, date_range)
-        if idx_range != self.idx_range:
-            self.idx_range = idx_range
-            range_updated = True
-            print(f"interval update: {date_range=}")
-
-        if tickers_updated or range_updated:
-            self.fig = plot_prices(
-                self.timestamps,
-                self.prices.prices_normalized,
-                self.prices.prices_raw,
-                self.prices.rolling_changes,
-                idx_range,
-            )
-
-        return self.fig
-
-    def _raw_prices_payload(self) -> dict[str, Any]:
-        return {
-            "timestamps_ms": (self.timestamps.astype("int64") // 10**6).tolist(),
-            "tickers": list(self.prices.tickers),
-            "prices": {t: self.prices.prices_raw[t].tolist() for t in self.prices.tickers},
+        self, prices: Prices, date_range: Sequence[str | None] = [None, None]
+    ) -> dict[str, Any]:
+        idx_range = date_to_idx_range(prices.date_range, date_range)
+        return plot_prices(
+            prices.date_range,
+            prices.prices_normalized,
+            prices.prices_raw,
+            prices.rolling_changes,
+            idx_range,
+        )
+
+    def _view_key(self, tickers: list[str], date_range: Sequence[str | None]) -> str | None:
+        """Return the content address of the figure and raw prices of the tickers.
+
+        It covers the tickers in order, the visible rows, the time index and the generations
+        of the cached prices, and is None while some of the prices are not in memory.
+        """
+        generations = self.cache.generations(tickers)
+        if None in generations:
+            return None
+        timestamps = trading_index(self.date_start, PRICES_RETRIEVAL_INTERVAL)
+        idx_range = date_to_idx_range(timestamps, date_range)
+        content = (tickers, idx_range, len(timestamps), timestamps[-1], generations)
+        return hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest()
+
+    def _encode_view(
+        self,
+        tickers: list[str],
+        date_range: Sequence[str | None],
+        outputs: list[dict[str, Any]],
+    ) -> bytes:
+        """Return the gzipped callback response setting the figure and raw prices.
+
+        The response is keyed by `outputs`, the figure and raw prices outputs of the running
+        callback as given by `ctx.outputs_list`, the way Dash answers multi-output callbacks.
+        """
+        prices = self.get_panel(tickers)
+        values = (self.update_figure(prices, date_range), self._raw_prices_payload(prices))
+        components: dict[str, dict[str, Any]] = {}
+        for output, value in zip(outputs, values):
+            # properties of outputs allowing duplicates carry an "@<hash>" suffix
+            components.setdefault(output["id"], {})[output["property"].split("@")[0]] = value
+        response = {"multi": True, "response": components}
+        return gzip.compress(to_json_plotly(response).encode(), APP_VIEW_CACHE_COMPRESSLEVEL)
+
+    def get_window_views(
+        self, tickers: list[str], date_range: Sequence[str | None]
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Return rows of the stats table and the correlation heatmap over the date range."""
+        if not tickers:
+            return [], plot_correlations([], np.empty((0, 0)))
+        benchmark = STATS_BENCHMARK_TICKER
+        prices = self.get_panel(tickers if benchmark in tickers else tickers + [benchmark])
+        idx_range = date_to_idx_range(prices.date_range, date_range)
+
+        stats = prices.get_risk_stats(idx_range, benchmark).loc[tickers]
+        stats = stats.astype(object).where(stats.notna(), None)
+        stats_rows = [{"ticker": ticker, **row} for ticker, row in stats.to_dict("index").items()]
+
+        # engines are shared by sessions with the same tickers and prices
+        key = (tuple(tickers), prices.version)
+        engine = self.covariances.get(key)
+        if engine is None:
+            engine = CovarianceEngine(prices.percentage_changes[tickers].to_numpy())
+            self.covariances.set(key, engine)
+        correlation = engine.correlation(*idx_range)
+        return stats_rows, plot_correlations(tickers, correlation)
+
+    @staticmethod
+    def _raw_prices_payload(prices: Prices) -> dict[str, Any]:
+        """Encode raw prices as base64 typed arrays, decoded by `_decodeRawPrices`."""
+        timestamps_ms = prices.date_range.asi8 // 10**6
+        prices_raw = prices.prices_raw
+        payload: dict[str, Any] = {
+            "dtype": APP_RAW_PRICES_DTYPE,
+            "tickers": list(prices.tickers),
+            "prices": {
+                t: encode_array(prices_raw[t], APP_RAW_PRICES_DTYPE) for t in prices.tickers
+            },
         }
+        # business days are regenerated in the browser from the first date and their count
+        if prices.date_range.freqstr == "B":
+            payload["calendar"] = {
+                "freq": "B",
+                "start_ms": int(timestamps_ms[0]),
+                "length": len(timestamps_ms),
+            }
+        else:
+            payload["calendar"] = {"freq": None, "timestamps_ms": encode_array(timestamps_ms)}
+        if metrics.enabled:
+            size = sum(map(len, payload["prices"].values()))
+            size += len(payload["calendar"].get("timestamps_ms", ""))
+            metrics.observe("raw_prices_payload_bytes", size, buckets=SIZE_BUCKETS)
+        return payload
 
-    def setup_app(self) -> None:
-        self.app = Dash(__name__)
-        self.app.layout = html.Div(
+    def serve_layout(self) -> html.Div:
+        """Return the page layout, with placeholders until the initial views are ready."""
+        # the views are replaced as a whole, read them once
+        views = self.initial_views if self.ready.is_set() else None
+        return html.Div(
             [
-                dcc.Graph(id="plotly-normalized-asset-prices", figure=self.fig),
+                html.Div(
+                    [
+                        dcc.Graph(
+                            id="plotly-normalized-asset-prices",
+                            figure=views["figure"] if views else plot_placeholder(),
+                            style={"flex": "3"},
+                        ),
+                        dcc.Graph(
+                            id="correlation-heatmap",
+                            figure=views["correlation_figure"] if views else plot_placeholder(),
+                            style={"flex": "1"},
+                        ),
+                    ],
+                    style={"display": "flex"},
+                ),
                 dcc.Store(id="debounced-relayout", data=None),
                 dcc.Store(id="active-interval-btn", data=self.initial_active_btn),
-                dcc.Store(id="raw-prices", data=self._raw_prices_payload()),
+                dcc.Store(id="raw-prices", data=views["raw_prices"] if views else None),
+                dcc.Store(id="visible-range", data=views["visible_range"] if views else None),
+                dcc.Interval(
+                    id="warm-up-poll", interval=APP_WARMUP_POLL_MS, disabled=views is not None
+                ),
                 self.interval_buttons_html,
                 self.ticker_selection,
+                setup_stats_table(views["stats_rows"] if views else []),
             ]
         )
 
-        # wait 100ms between the updates, even though o1 insists that it's not a
-        # "true debounce": https://chatgpt.com/share/677b0a08-712c-800c-8aa9-d4abdfa50f11
+    def setup_app(self) -> None:
+        self.app = Dash(__name__)
+        self.app.layout = self.serve_layout
+
+        @self.app.server.route("/metrics")
+        def serve_metrics() -> Response:
+            return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+        @self.app.server.after_request
+        def serve_view(response: Response) -> Response:
+            # callbacks that set g.view answer with no_update and the cached bytes replace
+            # the empty response, sent as they are to clients accepting gzip
+            view = g.pop("view", None)
+            if view is None:
+                return response
+            response = Response(status=200, mimetype="application/json")
+            if "gzip" in request.accept_encodings:
+                response.set_data(view)
+                response.headers["Content-Encoding"] = "gzip"
+            else:
+                response.set_data(gzip.decompress(view))
+            response.vary.add("Accept-Encoding")
+            return response
+
+        # debounce relayout events: every event cancels the pending timer and resolves the
+        # superseded promise with no_update, so only the last range of a burst rescales,
+        # on the next animation frame after APP_RELAYOUT_DEBOUNCE_MS of quiet
+        debounce_ms = APP_RELAYOUT_DEBOUNCE_MS
+        max_wait_ms = json.dumps(APP_RELAYOUT_MAX_WAIT_MS)
         self.app.clientside_callback(
-            """
-            function (relayoutData) {
-                return new Promise((resolve) => {
-                    setTimeout(function() {
-                        resolve('Figure updated.');
-                    }, 100);
-                });
-            }
+            f"""
+            function (relayoutData) {{
+                const noUpdate = window.dash_clientside.no_update;
+                const state = window._relayoutDebounce || (window._relayoutDebounce = {{
+                    timer: null, frame: null, resolve: null, since: null,
+                }});
+                if (state.timer !== null) clearTimeout(state.timer);
+                if (state.frame !== null) cancelAnimationFrame(state.frame);
+                if (state.resolve) state.resolve(noUpdate);
+                const now = Date.now();
+                if (state.since === null) state.since = now;
+                const maxWait = {max_wait_ms};
+                const delay = maxWait === null ?
+                    {debounce_ms} : Math.min({debounce_ms}, Math.max(0, state.since + maxWait - now));
+                return new Promise((resolve) => {{
+                    state.resolve = resolve;
+                    state.timer = setTimeout(() => {{
+                        state.timer = null;
+                        state.frame = requestAnimationFrame(() => {{
+                            state.frame = null;
+                            state.resolve = null;
+                            state.since = null;
+                            resolve(now);
+                        }});
+                    }}, delay);
+                }});
+            }}
             """,
             Output("debounced-relayout", "data"),
             Input("plotly-normalized-asset-prices", "relayoutData"),
@@ -228,6 +601,7 @@ class NormalizedAssetPricesApp:
             [State("ticker-input", "value"), State("ticker-selection", "value")],
             prevent_initial_call=True,
         )
+        @metrics.timed("callback_seconds", callback="update_tickers")
         def update_tickers(
             n_submit: int,
             selected_tickers: list[str] | None,
@@ -242,7 +616,7 @@ class NormalizedAssetPricesApp:
                 ticker = normalize_ticker_symbol(input_ticker)
                 if ticker in tickers:
                     return options, tickers, "", f"⚠️ `{ticker}` already added"
-                elif not self.prices.is_valid_ticker(ticker):
+                elif not self.get_prices([]).is_valid_ticker(ticker):
                     return options, tickers, "", f"❌ `{ticker}` is not valid"
                 elif len(tickers) >= APP_MAX_TICKERS:
                     return options, tickers, "", f"⛔ {APP_MAX_TICKERS} tickers max!"
@@ -255,6 +629,7 @@ class NormalizedAssetPricesApp:
                 options = [{"label": t, "value": t} for t in tickers]
                 return options, tickers, input_ticker or "", "Enter ticker symbol..."
 
+        max_points = PLOT_MAX_POINTS
         offsets_js = json.dumps(self.interval_offsets)
         btn_ids_js_inner = json.dumps(self.interval_buttons_ids)
         self.app.clientside_callback(
@@ -264,14 +639,15 @@ class NormalizedAssetPricesApp:
                 const btnIds = {btn_ids_js_inner};
                 const offsets = {offsets_js};
                 const nBtns = btnIds.length;
-                const rawPrices = args[nBtns];
+                const rawPayload = args[nBtns];
                 const currentFigure = args[nBtns + 1];
                 const ctx = window.dash_clientside.callback_context;
                 const triggeredId = ctx && ctx.triggered_id;
                 if (!triggeredId || !btnIds.includes(triggeredId) ||
-                    !rawPrices || !currentFigure) {{
-                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                    !rawPayload || !currentFigure) {{
+                    return Array(3).fill(window.dash_clientside.no_update);
                 }}
+                const rawPrices = _decodeRawPrices(rawPayload);
                 const tsMs = rawPrices.timestamps_ms;
                 const first = tsMs[0];
                 const last = tsMs[tsMs.length - 1];
@@ -280,20 +656,22 @@ class NormalizedAssetPricesApp:
                 if (triggeredId !== 'btn-ytd') {{
                     const range = _getDateRange(currentFigure.layout);
                     if (range[1]) {{
-                        const parsed = Date.parse(range[1]);
+                        const parsed = _parseDate(range[1]);
                         if (!isNaN(parsed)) baseEndMs = parsed;
                     }}
                 }}
                 const startMs = Math.max(first, baseEndMs - offsetDays * 86400000);
                 const d0 = _msToDate(startMs);
                 const d1 = _msToDate(baseEndMs);
-                const newFig = _rescale(currentFigure, rawPrices, d0, d1);
-                return [newFig, triggeredId];
+                const newFig = _rescale(
+                    currentFigure, rawPrices, d0, d1, _maxPoints({max_points}));
+                return [newFig, triggeredId, [d0, d1]];
             }}
             """,
             [
                 Output("plotly-normalized-asset-prices", "figure", allow_duplicate=True),
                 Output("active-interval-btn", "data", allow_duplicate=True),
+                Output("visible-range", "data", allow_duplicate=True),
             ],
             [Input(bid, "n_clicks") for bid in self.interval_buttons_ids],
             [
@@ -306,36 +684,40 @@ class NormalizedAssetPricesApp:
         tolerance_days = INTERVAL_LENGTH_TOLERANCE_DAYS
         self.app.clientside_callback(
             f"""
-            function (debounced, rawPrices, currentFigure, activeBtn) {{
+            function (debounced, rawPayload, currentFigure, activeBtn) {{
                 {_JS_HELPERS}
                 const offsets = {offsets_js};
                 const tolerance = {tolerance_days};
-                if (!debounced || !rawPrices || !currentFigure) {{
-                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                if (!debounced || !rawPayload || !currentFigure) {{
+                    return Array(3).fill(window.dash_clientside.no_update);
                 }}
                 const range = _getDateRange(currentFigure.layout);
                 if (!range[0] || !range[1]) {{
                     return [
                         window.dash_clientside.no_update,
                         activeBtn ? null : window.dash_clientside.no_update,
+                        window.dash_clientside.no_update,
                     ];
                 }}
                 let newActive = activeBtn;
                 if (activeBtn) {{
                     const lengthDays =
-                        (Date.parse(range[1]) - Date.parse(range[0])) / 86400000;
+                        (_parseDate(range[1]) - _parseDate(range[0])) / 86400000;
                     const expected = offsets[activeBtn];
                     if (Math.abs(lengthDays - expected) > tolerance) {{
                         newActive = null;
                     }}
                 }}
-                const newFig = _rescale(currentFigure, rawPrices, range[0], range[1]);
-                return [newFig, newActive];
+                const newFig = _rescale(
+                    currentFigure, _decodeRawPrices(rawPayload), range[0], range[1],
+                    _maxPoints({max_points}));
+                return [newFig, newActive, range];
             }}
             """,
             [
                 Output("plotly-normalized-asset-prices", "figure", allow_duplicate=True),
                 Output("active-interval-btn", "data", allow_duplicate=True),
+                Output("visible-range", "data", allow_duplicate=True),
             ],
             Input("debounced-relayout", "data"),
             [
@@ -352,25 +734,127 @@ class NormalizedAssetPricesApp:
                 Output("raw-prices", "data", allow_duplicate=True),
             ],
             Input("ticker-selection", "value"),
-            State("plotly-normalized-asset-prices", "figure"),
+            [State("plotly-normalized-asset-prices", "figure"), State("raw-prices", "data")],
             prevent_initial_call=True,
         )
+        @metrics.timed("callback_seconds", callback="on_tickers_change")
         def on_tickers_change(
             tickers: list[str] | None,
             current_figure: dict[str, Any],
+            raw_prices: dict[str, Any] | None,
         ) -> tuple[Any, Any]:
-            tickers = tickers or []
-            if list(tickers) == self.prices.tickers:
+            # the session's current tickers live in its own raw-prices store
+            tickers = normalize_tickers(tickers)
+            previous: list[str] = raw_prices["tickers"] if raw_prices else []
+            if raw_prices and tickers == previous:
                 return no_update, no_update
+            log_event("tickers_update", tickers=tickers, previous=previous)
             date_range = get_date_range(current_figure["layout"])
-            fig = self.update_figure(tickers, date_range)
-            return fig, self._raw_prices_payload()
+
+            # ship only the change when a single ticker is added or removed
+            if raw_prices and len(current_figure["data"]) == 2 * len(previous):
+                removed = [t for t in previous if t not in tickers]
+                if tickers[:-1] == previous:
+                    patches = self._patch_added_ticker(
+                        previous, tickers[-1], date_range, raw_prices
+                    )
+                    if patches is not None:
+                        return patches
+                elif len(removed) == 1 and [t for t in previous if t != removed[0]] == tickers:
+                    return self._patch_removed_ticker(previous, removed[0])
+
+            # full rebuilds of repeat views are served from the gzipped responses cache
+            key = self._view_key(tickers, date_range)
+            view = self.views.get(key) if key is not None else None
+            if view is None:
+                view = self._encode_view(tickers, date_range, ctx.outputs_list)
+                key = self._view_key(tickers, date_range)
+                if key is not None:
+                    self.views.set(key, view)
+            g.view = view
+            return no_update, no_update
+
+        @self.app.callback(
+            [
+                Output("plotly-normalized-asset-prices", "figure", allow_duplicate=True),
+                Output("raw-prices", "data", allow_duplicate=True),
+                Output("visible-range", "data", allow_duplicate=True),
+                Output("warm-up-poll", "disabled"),
+            ],
+            Input("warm-up-poll", "n_intervals"),
+            State("ticker-selection", "value"),
+            prevent_initial_call=True,
+        )
+        def on_warm_up(n_intervals: int, tickers: list[str] | None) -> tuple[Any, Any, Any, bool]:
+            if not self.ready.is_set():
+                return no_update, no_update, no_update, False
+            if list(tickers or []) != list(self.initial_tickers):
+                # the selection changed while warming up and already has its own figure
+                return no_update, no_update, no_update, True
+            views = self.initial_views
+            return views["figure"], views["raw_prices"], views["visible_range"], True
+
+        @self.app.callback(
+            [Output("stats-table", "data"), Output("correlation-heatmap", "figure")],
+            [Input("visible-range", "data"), Input("ticker-selection", "value")],
+            prevent_initial_call=True,
+        )
+        @metrics.timed("callback_seconds", callback="update_window_views")
+        def update_window_views(
+            date_range: list[str] | None, tickers: list[str] | None
+        ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+            return self.get_window_views(normalize_tickers(tickers), date_range or [None, None])
+
+    def _patch_added_ticker(
+        self,
+        previous: list[str],
+        ticker: str,
+        date_range: Sequence[str | None],
+        raw_prices: dict[str, Any],
+    ) -> tuple[Patch, Patch] | None:
+        """Return figure and raw-prices patches adding the ticker, None if a rebuild is due."""
+        prices = self.get_panel([ticker])
+        payload = self._raw_prices_payload(prices)
+        if payload["calendar"] != raw_prices["calendar"]:
+            return None
+        rangeslider_traces, main_traces = plot_traces(
+            prices.date_range,
+            prices.prices_normalized,
+            prices.prices_raw,
+            prices.rolling_changes,
+            date_to_idx_range(prices.date_range, date_range),
+            color_offset=len(previous),
+        )
+
+        fig_patch = Patch()
+        fig_patch["data"].insert(len(previous), rangeslider_traces[0])
+        fig_patch["data"].append(main_traces[0])
+        raw_prices_patch = Patch()
+        raw_prices_patch["tickers"].append(ticker)
+        raw_prices_patch["prices"][ticker] = payload["prices"][ticker]
+        return fig_patch, raw_prices_patch
+
+    def _patch_removed_ticker(self, previous: list[str], ticker: str) -> tuple[Patch, Patch]:
+        """Return figure and raw-prices patches removing the ticker and shifting colors."""
+        n, idx = len(previous), previous.index(ticker)
+        fig_patch = Patch()
+        del fig_patch["data"][n + idx]
+        del fig_patch["data"][idx]
+        for i in range(idx, n - 1):
+            color = COLORS[i % len(COLORS)]
+            fig_patch["data"][i]["line"]["color"] = color
+            fig_patch["data"][n - 1 + i]["line"]["color"] = color
+        raw_prices_patch = Patch()
+        raw_prices_patch["tickers"].remove(ticker)
+        del raw_prices_patch["prices"][ticker]
+        return fig_patch, raw_prices_patch
 
     def run(self, **kwargs: Any) -> None:
         self.app.run_server(**kwargs)
 
 
 def create_app() -> tuple[NormalizedAssetPricesApp, Any]:
+    setup_logging()
     dash_app = NormalizedAssetPricesApp()
     server = dash_app.app.server
     return dash_app, server
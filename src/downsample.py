@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Return indices of points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    `y` holds one series per column, all sharing `x`. The first and last points are always
+    kept and every bucket in between contributes the point forming the largest triangle
+    with the point kept from the previous bucket and the average of the next bucket. The
+    series are processed together, so the Python loop runs once per bucket, not per series.
+    Returns an (n_out, n_series) array of row indices, or all rows if there are not more
+    than n_out of them.
+    """
+    y = y.reshape(len(x), -1)
+    n, n_series = y.shape
+    if n <= n_out or n_out < 3:
+        return np.repeat(np.arange(n)[:, None], n_series, axis=1)
+
+    # n_out - 2 buckets of consecutive points between the first and the last point
+    edges = (1 + np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2))).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[: n - 1], edges[:-1], axis=0) / counts[:, None]
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.vstack([mean_y[1:], y[-1:]])
+
+    indices = np.empty((n_out, n_series), dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    columns = np.arange(n_series)
+    a = indices[0].copy()
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a, columns]
+        area = np.abs((ax - next_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi, None]) * (next_y[b] - ay))
+        a = lo + area.argmax(axis=0)
+        indices[b + 1] = a
+    return indices
@@ -0,0 +1,179 @@
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from src.constants import LOG_LEVEL, LOG_SAMPLE_RATE, METRICS_ENABLED
+
+F = TypeVar("F", bound=Callable[..., Any])
+Labels = tuple[tuple[str, str], ...]
+Collector = Callable[[], dict[str, dict[Labels, float]]]
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+logger = logging.getLogger("compare_stocks")
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms rendered in the Prometheus text format.
+
+    A disabled registry ignores updates and `timed` returns functions undecorated, so the
+    instrumentation costs nothing when turned off. Metrics are kept per process, each
+    gunicorn worker serves its own.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED) -> None:
+        self.enabled = enabled
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._collectors: list[Collector] = []
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"MetricsRegistry(enabled={self.enabled}, counters={sorted(self._counters)})"
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0.0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        **labels: str,
+    ) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            if key not in histograms:
+                histograms[key] = _Histogram(buckets)
+            histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds, even when it raises."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, LATENCY_BUCKETS, **labels)
+
+    def timed(self, name: str, **labels: str) -> Callable[[F], F]:
+        """Decorate a function to observe its duration in seconds."""
+
+        def decorator(fn: F) -> F:
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def collect(self, collector: Collector) -> None:
+        """Register a function returning counter values read when the metrics are rendered."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = {name: dict(values) for name, values in self._counters.items()}
+            histograms = {
+                name: {
+                    key: (h.buckets, list(h.counts), h.count, h.sum) for key, h in values.items()
+                }
+                for name, values in self._histograms.items()
+            }
+        for collector in self._collectors:
+            counters.update(collector())
+
+        lines: list[str] = []
+        for name, values in sorted(counters.items()):
+            lines.append(f"# TYPE {name} {'gauge' if name.endswith('_ratio') else 'counter'}")
+            lines.extend(f"{name}{_labels(key)} {value:g}" for key, value in values.items())
+        for name, snapshots in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, (buckets, counts, count, total) in snapshots.items():
+                for bound, bucket_count in zip(buckets, counts):
+                    le = (("le", f"{bound:g}"),)
+                    lines.append(f"{name}_bucket{_labels(key + le)} {bucket_count}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(key)} {total:g}")
+                lines.append(f"{name}_count{_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def hit_ratios(self) -> dict[str, dict[Labels, float]]:
+        """Return the hit ratio of each cache counted in `cache_requests_total`."""
+        with self._lock:
+            requests = dict(self._counters.get("cache_requests_total", {}))
+        totals: dict[str, list[float]] = {}
+        for key, value in requests.items():
+            labels = dict(key)
+            hits_total = totals.setdefault(labels["cache"], [0.0, 0.0])
+            hits_total[0] += value if labels["result"] == "hit" else 0.0
+            hits_total[1] += value
+        return {
+            "cache_hit_ratio": {
+                (("cache", cache),): hits / total for cache, (hits, total) in totals.items()
+            }
+        }
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+def log_event(
+    event: str, level: int = logging.INFO, sample_rate: float = LOG_SAMPLE_RATE, **fields: Any
+) -> None:
+    """Log an event as one JSON object, keeping only a sample of the routine ones."""
+    if not logger.isEnabledFor(level) or (sample_rate < 1.0 and random.random() >= sample_rate):
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str))
+
+
+def setup_logging(level: str = LOG_LEVEL) -> None:
+    """Send logs to stderr unless the host application already configured a handler."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+metrics = MetricsRegistry()
+metrics.collect(metrics.hit_ratios)
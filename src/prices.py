@@ -1,125 +1,633 @@
-from datetime import date
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
+from src.cache import SeriesCache, TTLCache
 from src.constants import (
     PRICES_EPS,
+    PRICES_INVALID_TICKER_TTL,
+    PRICES_MAX_WORKERS,
+    PRICES_RESCALE_RTOL,
     PRICES_RETRIEVAL_INTERVAL,
     PRICES_ROLLING_MIN_PERIOD,
+    PRICES_ROLLING_PERIOD,
     PRICES_ROLLING_WINDOW,
+    PRICES_STORAGE_DTYPE,
+    PRICES_SYMBOL_PREFILTER,
+    PRICES_VALID_TICKER_TTL,
 )
+from src.metrics import log_event, metrics
+from src.providers import PriceProvider, get_provider
+from src.sessions import (
+    INTRADAY_FREQS,
+    bar_end,
+    completed_bars_end,
+    is_intraday,
+    last_of_day,
+    split_index,
+    trading_index,
+)
+from src.singleflight import SingleFlight
+from src.slots import SlotArray
+from src.stats import RISK_STATS, risk_stats
+from src.store import PriceStore, get_price_store
+from src.utils import get_symbol_directory
+
+# concurrent provider calls with identical keys are made only once per process
+provider_calls: SingleFlight[tuple[Any, ...]] = SingleFlight()
+# positive and negative ticker validations, keyed by provider name and ticker
+validated_tickers: TTLCache[tuple[str, str], bool] = TTLCache("validated_tickers")
+metrics.collect(
+    lambda: {
+        "provider_calls_total": {
+            (("result", result),): count for result, count in provider_calls.stats().items()
+        }
+    }
+)
+
+
+MetricKey = tuple[str, tuple[tuple[str, Any], ...]]
+# differences of prefix sums lose too much precision in float32, keep these in float64
+CUMULATIVE_METRICS = ("cumulative_log_returns", "cumulative_changes", "cumulative_squares")
+
+
+def _percentage_changes(prices_normalized: np.ndarray) -> np.ndarray:
+    """Return changes between consecutive rows, with 0 for the first row and missing prices."""
+    shifted = np.vstack([np.full((1, prices_normalized.shape[1]), np.nan), prices_normalized[:-1]])
+    changes = prices_normalized / (shifted + PRICES_EPS) - 1
+    changes[np.isnan(changes)] = 0
+    return changes
+
+
+def _is_rescaled(stored: pd.Series, fetched: pd.Series) -> bool:
+    """Return whether fetched prices of already stored bars differ from the stored ones."""
+    overlap = stored.index.intersection(fetched.index)
+    return not np.allclose(
+        fetched[overlap].to_numpy(), stored[overlap].to_numpy(), rtol=PRICES_RESCALE_RTOL, atol=0
+    )
+
+
+def _extend_covered(
+    covered: tuple[pd.Timestamp, pd.Timestamp] | None,
+    fetched: pd.Series,
+    range_start: pd.Timestamp,
+    range_end: pd.Timestamp,
+    interval: str,
+) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """Return the covered range extended by prices fetched for [range_start, range_end)."""
+    covered_start, covered_end = covered if covered is not None else (range_start, range_start)
+    if not fetched.empty:
+        covered_end = max(covered_end, min(range_end, bar_end(fetched.index[-1], interval)))
+    return min(covered_start, range_start), covered_end
 
 
 class Prices:
-    """Retrieve historical prices and compute relevant metrics."""
+    """Retrieve historical prices and compute relevant metrics.
+
+    Raw prices are kept in a `SlotArray` with one contiguous series per ticker, so adding
+    and removing tickers only fills and frees slots. Derived metrics are computed by the
+    `_compute_<metric>` methods on first access and memoized per ticker, metric and
+    parameters until the raw prices of the ticker change. The frames exposed as attributes
+    are assembled from the arrays in ticker order whenever they are read.
+    """
 
-    def __init__(self, initial_tickers: list[str], date_start: str) -> None:
+    def __init__(
+        self,
+        initial_tickers: list[str],
+        date_start: str,
+        provider: PriceProvider | None = None,
+        store: PriceStore | SeriesCache | None = None,
+        yield_cache: dict[str, float] | None = None,
+        interval: str = PRICES_RETRIEVAL_INTERVAL,
+    ) -> None:
         self.tickers = list(initial_tickers)
-        self.date_range = pd.date_range(start=date_start, end=date.today(), freq="B")
-        self._yield_cache: dict[str, float] = {}
+        self.date_start = date_start
+        self.interval = interval
+        self.date_range = trading_index(date_start, interval)
+        self.provider = provider if provider is not None else get_provider()
+        self.store = store if store is not None else get_price_store(self.provider.name)
+        self._yield_cache = yield_cache if yield_cache is not None else {}
+        self._raw = SlotArray(len(self.date_range), PRICES_STORAGE_DTYPE)
+        self._metrics: dict[MetricKey, SlotArray] = {}
+        # metrics of prices shared between threads are computed by one of them at a time
+        self._metrics_lock = threading.RLock()
         self.get_relative_prices(initial_tickers)
 
     def __str__(self) -> str:
         return f"Prices(tickers={self.tickers})"
 
-    def get_historical_prices(self, tickers: str | list[str]) -> pd.DataFrame:
-        data = yf.download(
-            tickers,
-            interval=PRICES_RETRIEVAL_INTERVAL,
-            start=self.date_range[0],
-            end=self.date_range[-1],
-            auto_adjust=True,  # account for dividends
-            progress=False,
-        )
+    @metrics.timed("prices_fetch_seconds")
+    def get_historical_prices(
+        self, tickers: str | list[str], date_range: pd.DatetimeIndex | None = None
+    ) -> pd.DataFrame:
+        """Return close prices of the tickers over the time index, by default the current one."""
+        date_range = self.date_range if date_range is None else date_range
+        ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
 
-        if data is None or data.empty:
+        # look up yields concurrently with the batched price download
+        missing_yields = [t for t in ticker_list if t not in self._yield_cache]
+        n_cached = len(ticker_list) - len(missing_yields)
+        if n_cached:
+            provider_calls.hit(n_cached)
+            metrics.inc("cache_requests_total", n_cached, cache="yields", result="hit")
+        if missing_yields:
+            with ThreadPoolExecutor(max_workers=PRICES_MAX_WORKERS) as pool:
+                lookups = {t: pool.submit(self._get_annual_yield, t) for t in missing_yields}
+                data = self._read_index(ticker_list, date_range)
+                for lookup in lookups.values():
+                    lookup.result()
+        else:
+            data = self._read_index(ticker_list, date_range)
+
+        if ticker_list and data.empty:
             raise ValueError(f"No data retrieved for tickers: {tickers}")
 
-        df = data.Close.reindex(index=self.date_range).bfill().ffill()
+        df = data.reindex(index=date_range, columns=ticker_list).bfill().ffill()
+        return self._add_yield(df)
 
-        # add yield for securities without dividends (e.g. bonds, money market funds)
-        ticker_list = [tickers] if isinstance(tickers, str) else tickers
-        if ticker_list:
-            days_elapsed = (self.date_range - self.date_range[0]).days
-            for ticker in ticker_list:
+    def _add_yield(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add yield for securities without dividends (e.g. bonds, money market funds)."""
+        days_elapsed = (df.index - self.date_range[0]).days
+        for ticker in df.columns:
+            # looked up with the prices, read it back without counting another lookup
+            annual_yield = self._yield_cache.get(ticker)
+            if annual_yield is None:
                 annual_yield = self._get_annual_yield(ticker)
-                if annual_yield > 0:
-                    continuous_rate = np.log(1 + annual_yield)
-                    cumulative_factor = np.exp(continuous_rate * days_elapsed / 365.25)
-                    df[ticker] = df[ticker] * cumulative_factor
-
+            if annual_yield > 0:
+                continuous_rate = np.log(1 + annual_yield)
+                cumulative_factor = np.exp(continuous_rate * days_elapsed / 365.25)
+                df[ticker] = df[ticker] * cumulative_factor
         return df
 
+    def _read_index(self, tickers: list[str], date_range: pd.DatetimeIndex) -> pd.DataFrame:
+        """Return close prices over the time index, with daily bars before intraday bars."""
+        daily, intraday = split_index(date_range)
+        if intraday.empty:
+            return self._read_through(tickers, date_range[0], date_range[-1])
+        parts = []
+        if not daily.empty:
+            parts.append(self._read_through(tickers, daily[0], intraday[0].normalize()))
+        last_bar_end = intraday[-1] + pd.Timedelta(INTRADAY_FREQS[self.interval])
+        end = min(last_bar_end, completed_bars_end(self.interval))
+        parts.append(self._read_through(tickers, intraday[0], end, self.interval))
+        return pd.concat(parts)
+
+    def _download(
+        self, tickers: list[str], start: pd.Timestamp, end: pd.Timestamp, interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Download close prices of the tickers for the [start, end) range."""
+
+        def download(keys: list[tuple[Any, ...]]) -> dict[tuple[Any, ...], pd.Series]:
+            try:
+                data = self.provider.download([key[1] for key in keys], start, end, interval)
+            except Exception:
+                metrics.inc("upstream_errors_total", provider=self.provider.name, call="download")
+                raise
+            return {key: data[key[1]] for key in keys}
+
+        keys = [(self.provider.name, ticker, start, end, interval) for ticker in tickers]
+        results = provider_calls.do_batch(keys, download)
+        return pd.DataFrame({key[1]: results[key] for key in keys}, columns=tickers, dtype=float)
+
+    def _read_through(
+        self, tickers: list[str], start: pd.Timestamp, end: pd.Timestamp, interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Return close prices from the store, downloading and storing only missing ranges."""
+        if not tickers:
+            return pd.DataFrame(dtype=float)
+        if self.store is None:
+            return self._download(tickers, start, end, interval).dropna(how="all")
+
+        stored, covered, missing = self._find_missing(tickers, start, end, interval)
+        if not missing:
+            provider_calls.hit(len(tickers))
+        else:
+            # only one thread or worker process fetches a given ticker at a time, the others
+            # wait for the lock and then find the fetched prices in the store
+            missing_tickers = sorted(
+                {t for range_tickers in missing.values() for t in range_tickers}
+            )
+            with self.store.lock(missing_tickers, interval):
+                stored, covered, missing = self._find_missing(tickers, start, end, interval)
+                self._fetch_missing(stored, covered, missing, interval)
+
+        df = pd.DataFrame({ticker: stored[ticker] for ticker in tickers})
+        return df.loc[start:end].dropna(how="all")
+
+    def _find_missing(
+        self, tickers: list[str], start: pd.Timestamp, end: pd.Timestamp, interval: str = "1d"
+    ) -> tuple[
+        dict[str, pd.Series],
+        dict[str, tuple[pd.Timestamp, pd.Timestamp]],
+        dict[tuple[pd.Timestamp, pd.Timestamp], list[str]],
+    ]:
+        """Return stored prices, their covered ranges, and tickers per missing range."""
+        assert self.store is not None
+        stored: dict[str, pd.Series] = {}
+        covered: dict[str, tuple[pd.Timestamp, pd.Timestamp]] = {}
+        missing: dict[tuple[pd.Timestamp, pd.Timestamp], list[str]] = {}
+        for ticker in tickers:
+            loaded = self.store.load(ticker, interval)
+            if loaded is None:
+                stored[ticker] = pd.Series(dtype=float, name=ticker)
+                missing.setdefault((start, end), []).append(ticker)
+                continue
+            stored[ticker], covered[ticker] = loaded
+            covered_start, covered_end = covered[ticker]
+            if start < covered_start:
+                missing.setdefault((start, covered_start), []).append(ticker)
+            if end > covered_end:
+                # the last stored bar is fetched again to check that it was not rescaled
+                tail_start = min(covered_end, stored[ticker].index[-1])
+                missing.setdefault((tail_start, end), []).append(ticker)
+        return stored, covered, missing
+
+    def _fetch_missing(
+        self,
+        stored: dict[str, pd.Series],
+        covered: dict[str, tuple[pd.Timestamp, pd.Timestamp]],
+        missing: dict[tuple[pd.Timestamp, pd.Timestamp], list[str]],
+        interval: str = "1d",
+    ) -> None:
+        """Download the missing ranges into `stored` and write the results to the store.
+
+        Earlier history counts as covered once requested, since a ticker may not have existed
+        yet. Later history only counts as covered up to the end of the last bar that came
+        back, since an empty response may as well be an upstream failure, and the rest of
+        the range is requested again on the next read.
+
+        Adjusted closes of the whole history change with every split or dividend, so later
+        history is fetched from the last stored bar, and the full history is fetched again
+        when that bar no longer matches.
+        """
+        assert self.store is not None
+
+        # tickers that miss the same range are downloaded in a single batch
+        updated = set()
+        rescaled_ends: dict[str, pd.Timestamp] = {}
+        for (range_start, range_end), range_tickers in missing.items():
+            data = self._download(range_tickers, range_start, range_end, interval)
+            for ticker in range_tickers:
+                fetched = data[ticker].dropna()
+                if _is_rescaled(stored[ticker], fetched):
+                    rescaled_ends[ticker] = range_end
+                    continue
+                stored[ticker] = fetched.combine_first(stored[ticker])
+                covered[ticker] = _extend_covered(
+                    covered.get(ticker), fetched, range_start, range_end, interval
+                )
+                updated.add(ticker)
+
+        rescaled: dict[tuple[pd.Timestamp, pd.Timestamp], list[str]] = {}
+        for ticker, range_end in rescaled_ends.items():
+            rescaled.setdefault((covered[ticker][0], range_end), []).append(ticker)
+        for (range_start, range_end), range_tickers in rescaled.items():
+            log_event("prices_rescaled", sample_rate=1.0, tickers=range_tickers, interval=interval)
+            data = self._download(range_tickers, range_start, range_end, interval)
+            for ticker in range_tickers:
+                fetched = data[ticker].dropna()
+                if fetched.empty:
+                    # keep the stored prices, the next read checks them again
+                    continue
+                stored[ticker] = fetched
+                covered[ticker] = _extend_covered(None, fetched, range_start, range_end, interval)
+                updated.add(ticker)
+
+        for ticker in updated:
+            if not stored[ticker].empty:
+                self.store.save(ticker, stored[ticker], covered[ticker], interval)
+
+    @metrics.timed("prices_yield_lookup_seconds")
     def _get_annual_yield(self, ticker: str) -> float:
         """Return cached annual yield for dividend-less securities; 0.0 if none or unknown."""
         if ticker in self._yield_cache:
+            provider_calls.hit()
+            metrics.inc("cache_requests_total", cache="yields", result="hit")
             return self._yield_cache[ticker]
-        annual_yield = 0.0
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            if ticker_obj.dividends.empty:
-                annual_yield = float(ticker_obj.info.get("yield", 0.0) or 0.0)
-        except Exception as e:
-            print(f"Could not adjust yield for {ticker}: {e}")
+        metrics.inc("cache_requests_total", cache="yields", result="miss")
+        annual_yield = provider_calls.do(
+            (self.provider.name, "yield", ticker), lambda: self.provider.get_annual_yield(ticker)
+        )
         self._yield_cache[ticker] = annual_yield
         return annual_yield
 
     def get_relative_prices(self, tickers: list[str]) -> None:
-        self.prices_raw = self.get_historical_prices(tickers).reindex(columns=tickers)
-        self.prices_normalized = self.prices_raw / self.prices_raw.iloc[0]
-        self.percentage_changes = (
-            self.prices_normalized / (self.prices_normalized.shift(1) + PRICES_EPS) - 1
-        ).fillna(0)
-        self.rolling_changes = self.percentage_changes.rolling(
-            window=PRICES_ROLLING_WINDOW, min_periods=PRICES_ROLLING_MIN_PERIOD
-        ).sum()
+        prices_raw = self.get_historical_prices(tickers).reindex(columns=tickers)
+        self.tickers = list(tickers)
+        self._reset_raw(prices_raw)
+
+    def _reset_raw(self, prices_raw: pd.DataFrame) -> None:
+        """Replace all raw prices with ones over the current time index, dropping metrics."""
+        self._metrics.clear()
+        self._raw.clear()
+        self._raw.resize(len(self.date_range))
+        self._set_raw(prices_raw)
+
+    def _set_raw(self, prices_raw: pd.DataFrame) -> None:
+        """Store raw prices of the tickers, invalidating their memoized metrics."""
+        for ticker in prices_raw.columns:
+            self._raw.set(ticker, prices_raw[ticker].to_numpy())
+            for array in self._metrics.values():
+                array.discard(ticker)
+
+    def _frame(self, values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=self.date_range, columns=self.tickers)
+
+    @staticmethod
+    def _metric_key(metric: str, **params: Any) -> MetricKey:
+        return metric, tuple(sorted(params.items()))
+
+    def _metric_values(
+        self, tickers: list[str], metric: str, rows: slice = slice(None), **params: Any
+    ) -> np.ndarray:
+        """Return (rows x tickers) values of the metric, computing only tickers not memoized."""
+        compute = getattr(self, f"_compute_{metric}", None)
+        if compute is None:
+            raise ValueError(f"Unknown metric: {metric}")
+        key = self._metric_key(metric, **params)
+        with self._metrics_lock:
+            if key not in self._metrics:
+                dtype = "float64" if metric in CUMULATIVE_METRICS else PRICES_STORAGE_DTYPE
+                self._metrics[key] = SlotArray(len(self.date_range), dtype)
+            array = self._metrics[key]
+            missing = [ticker for ticker in tickers if ticker not in array]
+            if missing:
+                values = compute(missing, **params)
+                for i, ticker in enumerate(missing):
+                    array.set(ticker, values[:, i])
+            return array.take(tickers, rows)
+
+    def get_metric(self, metric: str, **params: Any) -> pd.DataFrame:
+        """Return a derived metric of the tickers, e.g. `get_metric("rolling_changes", ...)`."""
+        return self._frame(self._metric_values(self.tickers, metric, **params))
+
+    def _compute_prices_normalized(self, tickers: list[str]) -> np.ndarray:
+        prices_raw = self._raw.take(tickers).astype(np.float64)
+        return prices_raw / prices_raw[0]
+
+    def _compute_percentage_changes(self, tickers: list[str]) -> np.ndarray:
+        prices_normalized = self._metric_values(tickers, "prices_normalized")
+        return _percentage_changes(prices_normalized.astype(np.float64))
+
+    def _compute_cumulative_log_returns(self, tickers: list[str]) -> np.ndarray:
+        prices_normalized = self._metric_values(tickers, "prices_normalized")
+        return np.log(prices_normalized.astype(np.float64))
+
+    def _compute_cumulative_changes(self, tickers: list[str]) -> np.ndarray:
+        return np.cumsum(self._metric_values(tickers, "percentage_changes"), axis=0)
+
+    def _compute_cumulative_squares(self, tickers: list[str]) -> np.ndarray:
+        return np.cumsum(self._metric_values(tickers, "percentage_changes") ** 2, axis=0)
+
+    def _compute_rolling_changes(
+        self, tickers: list[str], window: int | str, min_periods: int
+    ) -> np.ndarray:
+        cumulative_changes = self._metric_values(tickers, "cumulative_changes")
+        cumulative_changes = np.vstack([np.zeros((1, len(tickers))), cumulative_changes])
+        ends = np.arange(len(self.date_range))
+        starts = self._window_starts(window)
+        rolling_changes = cumulative_changes[ends + 1] - cumulative_changes[starts]
+        rolling_changes[ends - starts + 1 < min_periods] = np.nan
+        return rolling_changes
+
+    def _window_starts(self, window: int | str) -> np.ndarray:
+        """Return the first row of the trailing window of rows or time that ends at each row."""
+        if isinstance(window, str):
+            timestamps = self.date_range.asi8
+            return np.searchsorted(
+                timestamps, timestamps - pd.Timedelta(window).value, side="right"
+            )
+        return np.maximum(0, np.arange(len(self.date_range)) - window + 1)
+
+    def get_window_stats(self, idx_range: tuple[int, int]) -> pd.DataFrame:
+        """Return the total return and the mean, volatility and sum of returns over the rows.
+
+        Statistics of the percentage changes in (idx0, idx1] are differences of prefix sums
+        at the two ends of the range, so any window costs the same regardless of its length.
+        """
+        idx0, idx1 = (idx % len(self.date_range) for idx in idx_range)
+        n = max(idx1 - idx0, 1)
+        stats = {}
+        for metric in CUMULATIVE_METRICS:
+            start = self._metric_values(self.tickers, metric, slice(idx0, idx0 + 1))[0]
+            end = self._metric_values(self.tickers, metric, slice(idx1, idx1 + 1))[0]
+            stats[metric] = end - start
+        mean = stats["cumulative_changes"] / n
+        variance = (stats["cumulative_squares"] - n * mean**2) / max(n - 1, 1)
+        return pd.DataFrame(
+            {
+                "return": np.expm1(stats["cumulative_log_returns"]),
+                "mean": mean,
+                "volatility": np.sqrt(np.maximum(variance, 0)),
+                "sum": stats["cumulative_changes"],
+            },
+            index=self.tickers,
+        )
+
+    def get_risk_stats(self, idx_range: tuple[int, int], benchmark: str) -> pd.DataFrame:
+        """Return risk and performance statistics over the rows against one of the tickers.
+
+        The total return, mean and volatility of daily prices come from the prefix sums of
+        `get_window_stats`. Intraday prices are reduced to daily closes first, since daily
+        and intraday rows of their index cannot be annualized together.
+        """
+        idx0, idx1 = (idx % len(self.date_range) for idx in idx_range)
+        rows = slice(idx0, idx1 + 1)
+        prices = self._raw.take(self.tickers, rows).astype(np.float64)
+        timestamps = self.date_range[rows]
+        benchmark_prices = self._raw.get(benchmark)[rows].astype(np.float64)
+        if is_intraday(self.interval):
+            closes = last_of_day(timestamps)
+            stats = risk_stats(
+                prices[closes], timestamps[closes].normalize(), benchmark_prices[closes]
+            )
+            return pd.DataFrame(stats, index=self.tickers, columns=RISK_STATS)
+
+        window = self.get_window_stats(idx_range)
+        stats = risk_stats(
+            prices,
+            timestamps,
+            benchmark_prices,
+            moments=(
+                window["return"].to_numpy(),
+                window["mean"].to_numpy(),
+                window["volatility"].to_numpy(),
+            ),
+        )
+        return pd.DataFrame(stats, index=self.tickers, columns=RISK_STATS)
+
+    def _rolling_params(self) -> dict[str, Any]:
+        # intraday bars roll over a period of time rather than a number of rows
+        window = PRICES_ROLLING_PERIOD if is_intraday(self.interval) else PRICES_ROLLING_WINDOW
+        return {"window": window, "min_periods": PRICES_ROLLING_MIN_PERIOD}
+
+    @property
+    def prices_raw(self) -> pd.DataFrame:
+        return self._frame(self._raw.take(self.tickers))
+
+    @property
+    def prices_normalized(self) -> pd.DataFrame:
+        return self.get_metric("prices_normalized")
+
+    @property
+    def percentage_changes(self) -> pd.DataFrame:
+        return self.get_metric("percentage_changes")
+
+    @property
+    def rolling_changes(self) -> pd.DataFrame:
+        return self.get_metric("rolling_changes", **self._rolling_params())
+
+    @property
+    def version(self) -> str:
+        """Return a digest of the time index and the latest prices of the tickers."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.interval}|{len(self.date_range)}|{self.date_range[-1]}".encode())
+        digest.update(self._raw.take(self.tickers, slice(-1, None)).tobytes())
+        return digest.hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the price arrays of the session."""
+        return self._raw.nbytes + sum(array.nbytes for array in self._metrics.values())
+
+    def refresh(self) -> None:
+        """Extend the prices up to today, fetching and computing only the new tail rows.
+
+        Prices are fetched before anything changes, so a failed fetch leaves the time index
+        and the arrays as they were.
+        """
+        date_range = trading_index(self.date_start, self.interval)
+        if is_intraday(self.interval):
+            # older intraday bars roll up into daily ones, so the index changes before the tail
+            self._reload(date_range)
+            return
+        if date_range[-1] == self.date_range[-1]:
+            return
+
+        # the last known row was forward-filled since the download range excludes its end
+        idx0 = len(self.date_range) - 1
+        data = self._read_through(self.tickers, date_range[0], date_range[-1])
+        # the row before is read again, splits and dividends rescale the whole history
+        idx_check = max(idx0 - 1, 0)
+        tail_dates = date_range[idx_check:]
+        raw_tail = self._add_yield(
+            data.reindex(index=data.index.union(tail_dates), columns=self.tickers)
+            .ffill()
+            .loc[tail_dates]
+        )
+        raw_check = self._raw.take(self.tickers, slice(idx_check, idx_check + 1))[0]
+        if not np.allclose(raw_tail.iloc[0], raw_check, rtol=PRICES_RESCALE_RTOL, atol=0):
+            self._reload(date_range)
+            return
+        self.date_range = date_range
+        self._append_tail(idx0, raw_tail.iloc[idx0 - idx_check :])
+
+    def _reload(self, date_range: pd.DatetimeIndex) -> None:
+        """Replace all prices with ones over the time index, fetched before anything changes."""
+        prices_raw = self.get_historical_prices(self.tickers, date_range)
+        self.date_range = date_range
+        self._reset_raw(prices_raw)
+
+    def _append_tail(self, idx0: int, raw_tail: pd.DataFrame) -> None:
+        """Replace all rows from idx0 onwards with the tail, extending memoized metrics."""
+        # rows before the tail that the rolling window of the first tail row reaches back to
+        head_start = max(0, idx0 - PRICES_ROLLING_WINDOW)
+        raw_first = self._raw.take(self.tickers, slice(0, 1))
+        raw_head = self._raw.take(self.tickers, slice(head_start, idx0))
+        for array in (self._raw, *self._metrics.values()):
+            array.resize(len(self.date_range))
+        for ticker in self.tickers:
+            self._raw.get(ticker)[idx0:] = raw_tail[ticker].to_numpy()
+
+        prices_normalized = np.vstack([raw_head, raw_tail[self.tickers].to_numpy()]) / raw_first
+        percentage_changes = _percentage_changes(prices_normalized)
+        rolling_params = self._rolling_params()
+        rolling_changes = (
+            pd.DataFrame(percentage_changes)
+            .rolling(window=rolling_params["window"], min_periods=rolling_params["min_periods"])
+            .sum()
+            .to_numpy()
+        )
+        tails = {
+            self._metric_key("cumulative_log_returns"): np.log(
+                prices_normalized[idx0 - head_start :]
+            ),
+            self._metric_key("prices_normalized"): prices_normalized[idx0 - head_start :],
+            self._metric_key("percentage_changes"): percentage_changes[idx0 - head_start :],
+            self._metric_key("rolling_changes", **rolling_params): rolling_changes[
+                idx0 - head_start :
+            ],
+        }
+        increments = {
+            self._metric_key("cumulative_changes"): percentage_changes[idx0 - head_start :],
+            self._metric_key("cumulative_squares"): percentage_changes[idx0 - head_start :] ** 2,
+        }
+        for key, array in self._metrics.items():
+            if key not in tails and key not in increments:
+                # other metrics are recomputed on their next access
+                array.clear()
+                continue
+            for i, ticker in enumerate(self.tickers):
+                if ticker not in array:
+                    continue
+                values = array.get(ticker)
+                if key in tails:
+                    values[idx0:] = tails[key][:, i]
+                else:
+                    previous = values[idx0 - 1] if idx0 else 0.0
+                    values[idx0:] = previous + np.cumsum(increments[key][:, i])
 
     def update_tickers(self, tickers: list[str]) -> None:
-        for ticker in self.tickers[:]:
-            if ticker not in tickers:
-                self.remove_ticker(ticker)
-        for ticker in tickers:
-            if ticker not in self.tickers:
-                self.add_ticker(ticker)
+        removed = [ticker for ticker in self.tickers if ticker not in tickers]
+        if removed:
+            self.remove_tickers(removed)
+        added = [ticker for ticker in tickers if ticker not in self.tickers]
+        if added:
+            self.add_tickers(added)
 
-        # reorder tickers
-        if self.tickers != tickers:
-            self.tickers = list(tickers)
-            self.prices_raw = self.prices_raw[tickers]
-            self.prices_normalized = self.prices_normalized[tickers]
-            self.percentage_changes = self.percentage_changes[tickers]
-            self.rolling_changes = self.rolling_changes[tickers]
+        # reorder tickers, the slots of the arrays stay where they are
+        self.tickers = list(tickers)
 
     def remove_ticker(self, ticker: str) -> None:
-        self.tickers.remove(ticker)
-        for df in [
-            self.prices_raw,
-            self.prices_normalized,
-            self.percentage_changes,
-            self.rolling_changes,
-        ]:
-            df.drop(ticker, axis=1, inplace=True)
+        self.remove_tickers([ticker])
+
+    def remove_tickers(self, tickers: list[str]) -> None:
+        self.tickers = [ticker for ticker in self.tickers if ticker not in tickers]
+        for ticker in tickers:
+            for array in (self._raw, *self._metrics.values()):
+                array.discard(ticker)
 
     def add_ticker(self, ticker: str) -> None:
-        ticker_df = self.get_historical_prices(ticker)
-        self.tickers.append(ticker)
-        self.prices_raw[ticker] = ticker_df
-        self.prices_normalized[ticker] = ticker_df / ticker_df.iloc[0]
-        self.percentage_changes[ticker] = (
-            self.prices_normalized[ticker] / (self.prices_normalized[ticker].shift(1) + PRICES_EPS)
-            - 1
-        ).fillna(0)
-        self.rolling_changes[ticker] = (
-            self.percentage_changes[ticker]
-            .rolling(window=PRICES_ROLLING_WINDOW, min_periods=PRICES_ROLLING_MIN_PERIOD)
-            .sum()
-        )
+        self.add_tickers([ticker])
+
+    def add_tickers(self, tickers: list[str]) -> None:
+        """Add tickers with a single batched download, deferring their metrics to first use."""
+        prices_raw = self.get_historical_prices(tickers)
+        self.tickers.extend(tickers)
+        self._set_raw(prices_raw)
 
     def is_valid_ticker(self, ticker: str) -> bool:
-        try:
-            data = yf.download(ticker, period="5d", progress=False, auto_adjust=False)
-            return data is not None and not data.empty
-        except Exception:
-            return False
+        """Validate the ticker by fetching its history, which the store keeps for adding it."""
+        key = (self.provider.name, ticker)
+        valid = validated_tickers.get(key)
+        if valid is not None:
+            provider_calls.hit()
+            return valid
+
+        if PRICES_SYMBOL_PREFILTER and ticker not in get_symbol_directory():
+            valid = False
+        else:
+            try:
+                data = self._read_through([ticker], self.date_range[0], self.date_range[-1])
+            except Exception:
+                # transient upstream errors say nothing about the ticker, don't remember them
+                return False
+            valid = not data.empty
+
+        ttl = PRICES_VALID_TICKER_TTL if valid else PRICES_INVALID_TICKER_TTL
+        validated_tickers.set(key, valid, ttl)
+        return valid
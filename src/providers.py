@@ -0,0 +1,201 @@
+import logging
+import os
+import zlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from src.constants import (
+    PRICES_AUTO_ADJUST,
+    PRICES_EXCHANGE_TIMEZONE,
+    PRICES_FIXTURES_DIR,
+    PRICES_PROVIDER,
+    PRICES_RETRIEVAL_INTERVAL,
+)
+from src.metrics import log_event, metrics
+from src.sessions import is_intraday, session_bars
+
+SYNTHETIC_DATE_ORIGIN = "1990-01-01"
+SYNTHETIC_DAILY_DRIFT = 3e-4
+SYNTHETIC_DAILY_VOLATILITY = 1.2e-2
+# yfinance errors that mean there are no prices, e.g. an unknown symbol or an empty range
+NO_DATA_ERRORS = ("possibly delisted", "no price data found")
+
+
+class PriceProvider(ABC):
+    """Source of historical close prices used by `Prices`."""
+
+    name = "base"
+
+    @abstractmethod
+    def download(
+        self,
+        tickers: list[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        interval: str = PRICES_RETRIEVAL_INTERVAL,
+    ) -> pd.DataFrame:
+        """Return close prices of the tickers for the [start, end) range, one column each."""
+
+    @abstractmethod
+    def get_annual_yield(self, ticker: str) -> float:
+        """Return annual yield of a security without dividends; 0.0 if none or unknown."""
+
+
+class YFinanceProvider(PriceProvider):
+    """Retrieve prices from Yahoo Finance via `yfinance`."""
+
+    name = "yfinance"
+
+    def __init__(self, auto_adjust: bool = PRICES_AUTO_ADJUST) -> None:
+        self.auto_adjust = auto_adjust
+
+    def download(
+        self,
+        tickers: list[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        interval: str = PRICES_RETRIEVAL_INTERVAL,
+    ) -> pd.DataFrame:
+        import yfinance as yf  # deferred, importing it is slow and only needed to fetch
+
+        data = yf.download(
+            tickers,
+            interval=interval,
+            start=start,
+            end=end,
+            auto_adjust=self.auto_adjust,
+            progress=False,
+        )
+        # yfinance records failed tickers instead of raising, tell failures from missing data
+        errors = {
+            ticker: error
+            for ticker, error in yf.shared._ERRORS.items()
+            if ticker in tickers and not any(no_data in error for no_data in NO_DATA_ERRORS)
+        }
+        if errors:
+            raise RuntimeError(f"Failed to download prices: {errors}")
+        if data is None or data.empty:
+            return pd.DataFrame(columns=tickers, dtype=float)
+        close = data.Close.reindex(columns=tickers)
+        if isinstance(close.index, pd.DatetimeIndex) and close.index.tz is not None:
+            # intraday bars are returned in exchange time, keep them as naive local times
+            close.index = close.index.tz_convert(PRICES_EXCHANGE_TIMEZONE).tz_localize(None)
+        return close
+
+    def get_annual_yield(self, ticker: str) -> float:
+        import yfinance as yf
+
+        annual_yield = 0.0
+        try:
+            ticker_obj = yf.Ticker(ticker)
+            if ticker_obj.dividends.empty:
+                annual_yield = float(ticker_obj.info.get("yield", 0.0) or 0.0)
+        except Exception as e:
+            metrics.inc("upstream_errors_total", provider=self.name, call="yield")
+            log_event(
+                "yield_lookup_failed", logging.WARNING, sample_rate=1.0, ticker=ticker, error=str(e)
+            )
+        return annual_yield
+
+
+class LocalProvider(PriceProvider):
+    """Deterministic offline prices for benchmarks and tests without network access.
+
+    Prices of a ticker are read from `<fixtures_dir>/<ticker>.csv` (or `.parquet`, and
+    `<ticker>.<interval>.csv` for intraday intervals) with `Date` and `Close` columns if
+    such a fixture exists. Otherwise they are generated as a geometric random walk seeded
+    by the ticker symbol, with intraday bars bridging consecutive daily closes, so that
+    every call returns the same series for the same ticker.
+    """
+
+    name = "local"
+
+    def __init__(self, fixtures_dir: str | None = None, synthetic: bool = True) -> None:
+        self.fixtures_dir = fixtures_dir
+        self.synthetic = synthetic
+        self._fixtures: dict[str, pd.Series] = {}
+
+    def _fixture_path(self, ticker: str, interval: str) -> str | None:
+        if self.fixtures_dir:
+            name = ticker if interval == "1d" else f"{ticker}.{interval}"
+            for ext in ("csv", "parquet"):
+                path = os.path.join(self.fixtures_dir, f"{name}.{ext}")
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _load_fixture(self, ticker: str, interval: str) -> pd.Series | None:
+        path = self._fixture_path(ticker, interval)
+        if path is None:
+            return None
+        if path in self._fixtures:
+            return self._fixtures[path]
+        if path.endswith(".csv"):
+            df = pd.read_csv(path, index_col="Date", parse_dates=True)
+        else:
+            df = pd.read_parquet(path).set_index("Date")
+        series = df["Close"].astype(float).sort_index().rename(ticker)
+        self._fixtures[path] = series
+        return series
+
+    def _random_walk(self, ticker: str, end: pd.Timestamp) -> pd.Series:
+        dates = pd.date_range(start=SYNTHETIC_DATE_ORIGIN, end=end, freq="B")
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        # drawn before the returns, so that the price of a day does not depend on the end
+        start_price = rng.uniform(10, 500)
+        log_returns = rng.normal(SYNTHETIC_DAILY_DRIFT, SYNTHETIC_DAILY_VOLATILITY, len(dates))
+        return pd.Series(start_price * np.exp(np.cumsum(log_returns)), index=dates, name=ticker)
+
+    def _intraday_walk(
+        self, ticker: str, start: pd.Timestamp, end: pd.Timestamp, interval: str
+    ) -> pd.Series:
+        days = pd.date_range(start=start.normalize(), end=end, freq="B")
+        if days.empty:
+            return pd.Series(dtype=float, name=ticker)
+        log_close = np.log(self._random_walk(ticker, end))
+        log_prev_close = log_close.shift(1).bfill()
+        n_bars = len(session_bars(days[0], days[0], interval))
+        fraction = np.arange(1, n_bars + 1) / n_bars
+        paths = []
+        for day in days:
+            # brownian bridge from the previous close to the close of the day
+            rng = np.random.default_rng(zlib.crc32(f"{ticker}{day:%Y%m%d}".encode()))
+            steps = rng.normal(0, SYNTHETIC_DAILY_VOLATILITY / np.sqrt(n_bars), n_bars)
+            trend = fraction * (log_close[day] - log_prev_close[day])
+            paths.append(log_prev_close[day] + trend + np.cumsum(steps) - fraction * steps.sum())
+        bars = session_bars(days[0], days[-1], interval)
+        series = pd.Series(np.exp(np.concatenate(paths)), index=bars, name=ticker)
+        return series[(series.index >= start) & (series.index < end)]
+
+    def download(
+        self,
+        tickers: list[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        interval: str = PRICES_RETRIEVAL_INTERVAL,
+    ) -> pd.DataFrame:
+        columns = {}
+        for ticker in tickers:
+            series = self._load_fixture(ticker, interval)
+            if series is None and self.synthetic:
+                if is_intraday(interval):
+                    series = self._intraday_walk(ticker, start, end, interval)
+                else:
+                    series = self._random_walk(ticker, end)
+            if series is not None:
+                columns[ticker] = series[(series.index >= start) & (series.index < end)]
+        return pd.DataFrame(columns, columns=tickers, dtype=float)
+
+    def get_annual_yield(self, ticker: str) -> float:
+        return 0.0
+
+
+def get_provider(name: str = PRICES_PROVIDER) -> PriceProvider:
+    """Return the price provider with the given name."""
+    if name == YFinanceProvider.name:
+        return YFinanceProvider()
+    elif name == LocalProvider.name:
+        return LocalProvider(PRICES_FIXTURES_DIR)
+    raise ValueError(f"Unknown price provider: {name}")
@@ -0,0 +1,91 @@
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.constants import (
+    PRICES_EXCHANGE_TIMEZONE,
+    PRICES_INTRADAY_LOOKBACK_DAYS,
+    PRICES_SESSION_CLOSE,
+    PRICES_SESSION_OPEN,
+)
+
+INTRADAY_FREQS = {
+    "1m": "1min",
+    "2m": "2min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "60m": "60min",
+    "90m": "90min",
+    "1h": "60min",
+}
+
+
+def is_intraday(interval: str) -> bool:
+    return interval in INTRADAY_FREQS
+
+
+def session_bars(day_start: pd.Timestamp, day_end: pd.Timestamp, interval: str) -> pd.DatetimeIndex:
+    """Return start times of intraday bars in regular sessions of business days in the range.
+
+    The last bar of a session may be partial, e.g. the 15:30 bar of 60m and 90m intervals.
+    """
+    days = pd.date_range(start=day_start, end=day_end, freq="B")
+    # every bar starting strictly before the close
+    offsets = pd.timedelta_range(
+        start=PRICES_SESSION_OPEN,
+        end=pd.Timedelta(PRICES_SESSION_CLOSE) - pd.Timedelta(1, "ns"),
+        freq=INTRADAY_FREQS[interval],
+    )
+    return pd.DatetimeIndex((days.to_numpy()[:, None] + offsets.to_numpy()[None, :]).ravel())
+
+
+def trading_index(date_start: str | pd.Timestamp, interval: str) -> pd.DatetimeIndex:
+    """Return the time index of prices from date_start until today.
+
+    Daily intervals use business days. Intraday intervals keep business days for older
+    history and split only the last `PRICES_INTRADAY_LOOKBACK_DAYS` business days into
+    session bars, which keeps the index size bounded regardless of the history length.
+    Intraday timestamps are naive exchange-local times. The index is built once a day and
+    shared by all callers, it must not be modified.
+    """
+    return _trading_index(date_start, interval, date.today())
+
+
+@lru_cache(maxsize=32)
+def _trading_index(date_start: str | pd.Timestamp, interval: str, today: date) -> pd.DatetimeIndex:
+    days = pd.date_range(start=date_start, end=today, freq="B")
+    if not is_intraday(interval):
+        return days
+    split = max(0, len(days) - PRICES_INTRADAY_LOOKBACK_DAYS[interval])
+    return days[:split].append(session_bars(days[split], days[-1], interval))
+
+
+def bar_end(start: pd.Timestamp, interval: str) -> pd.Timestamp:
+    """Return the time at which the bar starting at `start` completes.
+
+    Daily bars complete at the start of the next business day.
+    """
+    if is_intraday(interval):
+        return start + pd.Timedelta(INTRADAY_FREQS[interval])
+    return start + pd.offsets.BDay(1)
+
+
+def split_index(index: pd.DatetimeIndex) -> tuple[pd.DatetimeIndex, pd.DatetimeIndex]:
+    """Split a trading index into its daily part and its intraday part."""
+    is_daily = index == index.normalize()
+    return index[is_daily], index[~is_daily]
+
+
+def last_of_day(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return positions of the last row of each day in a trading index."""
+    days = index.normalize().asi8
+    return np.flatnonzero(np.append(days[1:] != days[:-1], True))
+
+
+def completed_bars_end(interval: str) -> pd.Timestamp:
+    """Return the exchange-local time before which all intraday bars have completed."""
+    now = pd.Timestamp.now(tz=PRICES_EXCHANGE_TIMEZONE).tz_localize(None)
+    return now - pd.Timedelta(INTRADAY_FREQS[interval])
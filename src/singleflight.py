@@ -0,0 +1,82 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class _Call:
+    """Result of one in-flight call that other callers can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[K]):
+    """Coalesce concurrent calls with identical keys into a single in-flight call.
+
+    Callers that request a key while another thread is already computing it wait for that
+    call and share its result instead of repeating it. Nothing is cached after a call
+    completes, so this only deduplicates work that overlaps in time.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._calls: dict[K, _Call] = {}
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"SingleFlight({self.stats()})"
+
+    def stats(self) -> dict[str, int]:
+        """Return counters of hits, executed calls (misses), and coalesced calls."""
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def hit(self, count: int = 1) -> None:
+        """Record requests that were answered without making a call."""
+        with self._lock:
+            self.hits += count
+
+    def do(self, key: K, fn: Callable[[], Any]) -> Any:
+        """Return fn(), sharing the result with concurrent calls for the same key."""
+        return self.do_batch([key], lambda keys: {key: fn()})[key]
+
+    def do_batch(self, keys: list[K], fn: Callable[[list[K]], dict[K, Any]]) -> dict[K, Any]:
+        """Return results for all keys, calling fn only with the keys that are not in flight."""
+        leading: dict[K, _Call] = {}
+        waiting: dict[K, _Call] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._calls:
+                    waiting[key] = self._calls[key]
+                else:
+                    leading[key] = self._calls[key] = _Call()
+            self.misses += len(leading)
+            self.coalesced += len(waiting)
+
+        results: dict[K, Any] = {}
+        if leading:
+            try:
+                results = fn(list(leading))
+                for key, call in leading.items():
+                    call.result = results.get(key)
+            except BaseException as e:
+                for call in leading.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key, call in leading.items():
+                        del self._calls[key]
+                        call.done.set()
+
+        for key, call in waiting.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class SlotArray:
+    """Contiguous (keys x rows) array of equally long series, one slot per key.
+
+    Each key owns a row of a single 2D array, so the values of a series are contiguous and
+    a set of series is gathered with one fancy-indexing operation. Removing a key only
+    frees its slot and adding one reuses a free slot, or doubles the capacity when there
+    is none, so key changes never reallocate or consolidate the other series.
+    """
+
+    def __init__(self, n_rows: int, dtype: str = "float64") -> None:
+        self.values = np.empty((0, n_rows), dtype=dtype)
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+
+    def __str__(self) -> str:
+        return f"SlotArray(keys={list(self._slots)}, shape={self.values.shape})"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def n_rows(self) -> int:
+        return self.values.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def get(self, key: str) -> np.ndarray:
+        """Return a writable view of the series of the key."""
+        return self.values[self._slots[key]]
+
+    def set(self, key: str, values: np.ndarray) -> None:
+        """Store the series of the key, taking a free slot if the key has none."""
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._slots[key] = self._free.pop()
+        self.values[slot] = values
+
+    def discard(self, key: str) -> None:
+        """Free the slot of the key if it has one."""
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        self._free.extend(self._slots.values())
+        self._slots.clear()
+
+    def take(self, keys: list[str], rows: slice = slice(None)) -> np.ndarray:
+        """Return a (rows x keys) copy of the series of the keys."""
+        return self.values[[self._slots[key] for key in keys], rows].T
+
+    def resize(self, n_rows: int) -> None:
+        """Truncate or extend all series to n_rows, leaving new rows uninitialized."""
+        values = np.empty((len(self.values), n_rows), dtype=self.values.dtype)
+        n_kept = min(n_rows, self.n_rows)
+        values[:, :n_kept] = self.values[:, :n_kept]
+        self.values = values
+
+    def _grow(self) -> None:
+        capacity = len(self.values)
+        new_capacity = max(1, 2 * capacity)
+        values = np.empty((new_capacity, self.n_rows), dtype=self.values.dtype)
+        values[:capacity] = self.values
+        self.values = values
+        self._free.extend(reversed(range(capacity, new_capacity)))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from src.constants import STATS_RISK_FREE_RATE
+
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+RISK_STATS = [
+    "cagr",
+    "volatility",
+    "sharpe",
+    "max_drawdown",
+    "beta",
+    "correlation",
+    "best",
+    "worst",
+]
+
+
+def risk_stats(
+    prices: np.ndarray,
+    timestamps: pd.DatetimeIndex,
+    benchmark: np.ndarray,
+    risk_free_rate: float = STATS_RISK_FREE_RATE,
+    moments: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
+) -> dict[str, np.ndarray]:
+    """Return risk and performance statistics of each column of (rows x tickers) prices.
+
+    Every statistic is a single vectorized pass over all tickers. Returns are annualized
+    with the number of rows per year of the window, which must all be bars of one size,
+    and the best and worst returns are those of a single row. Beta and correlation are
+    measured against the returns of the benchmark prices over the same rows. Statistics
+    are NaN for windows shorter than three rows.
+
+    `moments` may give the total return and the mean and standard deviation of the returns
+    of each column, e.g. from prefix sums, which are then not summed over the rows again.
+    """
+    years = (timestamps[-1] - timestamps[0]).total_seconds() / SECONDS_PER_YEAR
+    n = len(prices) - 1
+    if n < 2 or years <= 0:
+        return {stat: np.full(prices.shape[1], np.nan) for stat in RISK_STATS}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[1:] / prices[:-1] - 1
+        if moments is None:
+            total_return = prices[-1] / prices[0] - 1
+            mean = returns.mean(axis=0)
+            std = np.sqrt(((returns - mean) ** 2).sum(axis=0) / (n - 1))
+        else:
+            total_return, mean, std = moments
+        deviations = returns - mean
+        rows_per_year = n / years
+
+        benchmark_returns = benchmark[1:] / benchmark[:-1] - 1
+        benchmark_deviations = benchmark_returns - benchmark_returns.mean()
+        benchmark_std = np.sqrt((benchmark_deviations**2).sum() / (n - 1))
+        covariance = (deviations * benchmark_deviations[:, None]).sum(axis=0) / (n - 1)
+
+        # drawdowns from the running maximum of each ticker
+        drawdowns = prices / np.maximum.accumulate(prices, axis=0) - 1
+
+        return {
+            "cagr": (1 + total_return) ** (1 / years) - 1,
+            "volatility": std * np.sqrt(rows_per_year),
+            "sharpe": (mean * rows_per_year - risk_free_rate) / (std * np.sqrt(rows_per_year)),
+            "max_drawdown": drawdowns.min(axis=0),
+            "beta": covariance / benchmark_std**2,
+            "correlation": covariance / (std * benchmark_std),
+            "best": returns.max(axis=0),
+            "worst": returns.min(axis=0),
+        }
@@ -0,0 +1,128 @@
+import fcntl
+import json
+import os
+import re
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from src.constants import PRICES_AUTO_ADJUST, PRICES_STORE_DIR
+
+STORE_DTYPE = np.dtype([("timestamp", "<i8"), ("close", "<f8")])
+# tickers name the store files, anything else could point outside the store directory
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9.^=\-]{1,15}")
+
+
+class PriceStore:
+    """Persistent per-ticker close prices, one memory-mapped `.npy` file per ticker.
+
+    Each ticker is stored as a record array of (timestamp, close) next to a small json
+    sidecar with the date range that has already been requested from the provider, so
+    that only the missing part of a requested range has to be fetched. The files can be
+    shared by several worker processes: memory-mapped prices live in the shared page cache,
+    and `lock` serializes fetches of the same ticker across processes.
+    """
+
+    def __init__(self, root: str, auto_adjust: bool = True) -> None:
+        self.root = root
+        self.auto_adjust = auto_adjust
+        os.makedirs(root, exist_ok=True)
+
+    def __str__(self) -> str:
+        return f"PriceStore(root={self.root}, auto_adjust={self.auto_adjust})"
+
+    def _path(self, ticker: str, interval: str, ext: str) -> str:
+        if not SYMBOL_PATTERN.fullmatch(ticker):
+            raise ValueError(f"Invalid ticker symbol: {ticker!r}")
+        adjust = "adj" if self.auto_adjust else "raw"
+        if interval != "1d":
+            adjust = f"{adjust}.{interval}"
+        return os.path.join(self.root, f"{ticker}.{adjust}.{ext}")
+
+    def load(
+        self, ticker: str, interval: str = "1d"
+    ) -> tuple[pd.Series, tuple[pd.Timestamp, pd.Timestamp]] | None:
+        """Return stored prices and the covered date range, or None if nothing is stored."""
+        try:
+            with open(self._path(ticker, interval, "json")) as f:
+                meta = json.load(f)
+            records = np.load(self._path(ticker, interval, "npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        series = pd.Series(
+            np.asarray(records["close"]),
+            index=pd.DatetimeIndex(np.asarray(records["timestamp"]).astype("datetime64[ns]")),
+            name=ticker,
+        )
+        covered = (pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"]))
+        return series, covered
+
+    @contextmanager
+    def lock(self, tickers: list[str], interval: str = "1d") -> Iterator[None]:
+        """Hold exclusive file locks on the tickers, acquired in sorted order.
+
+        Lock files of tickers that still have no stored prices when released, e.g. mistyped
+        symbols checked for validity, are removed so they don't accumulate in the store.
+        """
+        with ExitStack() as stack:
+            for ticker in sorted(set(tickers)):
+                path = self._path(ticker, interval, "lock")
+                stack.enter_context(_locked_file(path))
+                # runs before the file is unlocked
+                stack.callback(self._discard_unused_lock, ticker, interval, path)
+            yield
+
+    def _discard_unused_lock(self, ticker: str, interval: str, path: str) -> None:
+        if not os.path.exists(self._path(ticker, interval, "npy")):
+            os.unlink(path)
+
+    def save(
+        self,
+        ticker: str,
+        series: pd.Series,
+        covered: tuple[pd.Timestamp, pd.Timestamp],
+        interval: str = "1d",
+    ) -> None:
+        """Atomically replace stored prices of the ticker and its covered date range."""
+        series = series.dropna().sort_index()
+        records = np.rec.fromarrays(
+            [series.index.asi8, series.to_numpy(dtype=np.float64)], dtype=STORE_DTYPE
+        )
+
+        # write to temporary files first so that concurrent readers never see partial data
+        npy_path = self._path(ticker, interval, "npy")
+        json_path = self._path(ticker, interval, "json")
+        with open(npy_path + ".tmp", "wb") as f:
+            np.save(f, records)
+        with open(json_path + ".tmp", "w") as f:
+            json.dump({"start": covered[0].isoformat(), "end": covered[1].isoformat()}, f)
+        os.replace(npy_path + ".tmp", npy_path)
+        os.replace(json_path + ".tmp", json_path)
+
+
+@contextmanager
+def _locked_file(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on the file at path, creating it if needed."""
+    while True:
+        lock_file = open(path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # the holder before us may have removed the file, then lock the one now at path
+        try:
+            if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        lock_file.close()
+    try:
+        yield
+    finally:
+        lock_file.close()
+
+
+def get_price_store(provider_name: str) -> PriceStore | None:
+    """Return the persistent store for prices of the provider, or None if it is disabled."""
+    if not PRICES_STORE_DIR:
+        return None
+    return PriceStore(os.path.join(PRICES_STORE_DIR, provider_name), auto_adjust=PRICES_AUTO_ADJUST)
@@ -1,12 +1,16 @@
-import itertools
 from datetime import datetime
+from functools import cache
+from typing import Any
 
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from dash import dcc, html
+from dash import dash_table, dcc, html
+from dash.dash_table.Format import Format, Scheme
 
-from src.constants import COLORS
-from src.utils import normalize_prices
+from src.constants import COLORS, PLOT_MAX_POINTS, STATS_BENCHMARK_TICKER
+from src.downsample import lttb_indices
+from src.metrics import metrics
+from src.utils import format_timestamp
 
 BUTTON_STYLE_INACTIVE = {
     "padding": "10px 20px",
@@ -24,6 +28,15 @@ BUTTON_STYLE_ACTIVE = {
     "color": "#FFFFFF",
     "borderColor": COLORS[0],
 }
+HOVERTEMPLATE = (
+    "<span style='font-family:Courier New,monospace'>"
+    "<b>%{y:+.2f}%</b> · $%{customdata:,.2f}"
+    "</span><br>"
+    "<span style='font-family:Courier New,monospace'>"
+    "<b>%{fullData.name}</b> · %{x|%d %b %Y}"
+    "</span>"
+    "<extra></extra>"
+)
 
 
 def setup_ticker_selection(initial_tickers: list[str]) -> html.Div:
@@ -113,70 +126,144 @@ def setup_interval_buttons() -> tuple[html.Div, list[str], dict[str, int]]:
     return interval_buttons_html, interval_buttons_ids, interval_offsets
 
 
-def plot_prices(
+def setup_stats_table(data: list[dict[str, Any]]) -> html.Div:
+    percentage = Format(precision=2, scheme=Scheme.percentage)
+    decimal = Format(precision=2, scheme=Scheme.fixed)
+    columns = [
+        dict(name="Ticker", id="ticker"),
+        dict(name="CAGR", id="cagr", type="numeric", format=percentage),
+        dict(name="Volatility", id="volatility", type="numeric", format=percentage),
+        dict(name="Sharpe", id="sharpe", type="numeric", format=decimal),
+        dict(name="Max drawdown", id="max_drawdown", type="numeric", format=percentage),
+        dict(name=f"Beta ({STATS_BENCHMARK_TICKER})", id="beta", type="numeric", format=decimal),
+        dict(name="Correlation", id="correlation", type="numeric", format=decimal),
+        dict(name="Best day", id="best", type="numeric", format=percentage),
+        dict(name="Worst day", id="worst", type="numeric", format=percentage),
+    ]
+    stats_table = html.Div(
+        dash_table.DataTable(
+            id="stats-table",
+            columns=columns,
+            data=data,
+            style_cell={
+                "fontFamily": "'Courier New', Courier, monospace",
+                "textAlign": "right",
+                "padding": "5px 10px",
+            },
+            style_cell_conditional=[{"if": {"column_id": "ticker"}, "textAlign": "left"}],
+            style_header={"fontWeight": "bold"},
+        ),
+        style={"marginTop": "10px", "marginLeft": "80px", "marginRight": "80px"},
+    )
+    return stats_table
+
+
+@cache
+def get_plotly_template() -> dict[str, Any]:
+    """Return the default plotly template as a plain dict, resolved once per process."""
+    import plotly.io as pio  # deferred, loading the templates is slow
+
+    return pio.templates["plotly"].to_plotly_json()
+
+
+def plot_traces(
     timestamps: pd.DatetimeIndex,
     prices: pd.DataFrame,
     prices_raw: pd.DataFrame,
     rolling_changes: pd.DataFrame,
     idx_range: tuple[int, int],
-) -> go.Figure:
-    idx0, idx1 = idx_range
-    date_range = [timestamps[idx0], timestamps[idx1]]
-    prices_normalized = normalize_prices(prices, date_range)
+    color_offset: int = 0,
+    max_points: int = PLOT_MAX_POINTS,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Return rangeslider and main plot traces, coloring the first asset with COLORS[offset].
 
-    fig = go.Figure()
+    Traces are plain dicts with numeric arrays, which skips the validation of plotly graph
+    objects, and hover labels are formatted by plotly.js from y and the raw prices in customdata.
+    The rangeslider overview and the visible window of the main plot are downsampled to at
+    most `max_points` points per trace.
+    """
+    idx0, idx1 = idx_range
+    window = slice(idx0 % len(timestamps), idx1 % len(timestamps) + 1)
+    is_daily = (timestamps == timestamps.normalize()).all()
+    x_values = np.datetime_as_string(timestamps.to_numpy(), unit="D" if is_daily else "m")
+    x_numeric = timestamps.asi8.astype(np.float64)
+    # relative change over the visible window, the only rows shown by the main plot
+    values = prices.to_numpy()[window]
+    y_values = 100 * (values / values[0] - 1)
+    raw_values = prices_raw[prices.columns].to_numpy()
+    rolling_values = rolling_changes[prices.columns].to_numpy()
+    colors = [COLORS[(color_offset + i) % len(COLORS)] for i in range(len(prices.columns))]
 
     # rangeslider plot
-    colors = itertools.cycle(COLORS)
-    for asset in prices.columns:
-        fig.add_trace(
-            go.Scatter(
-                x=timestamps,
-                y=rolling_changes[asset],
-                line=dict(color=next(colors)),
-                xaxis="x1",
-                yaxis="y1",
-                showlegend=False,
-            )
+    kept = lttb_indices(x_numeric, rolling_values, max_points)
+    rangeslider_traces = [
+        dict(
+            type="scatter",
+            x=x_values[kept[:, i]],
+            y=rolling_values[kept[:, i], i],
+            line=dict(color=color),
+            xaxis="x",
+            yaxis="y",
+            showlegend=False,
         )
+        for i, color in enumerate(colors)
+    ]
 
-    # main plot
-    colors = itertools.cycle(COLORS)
-    for asset in prices_normalized.columns:
-        y_values = 100 * prices_normalized[asset]
-        customdata = [
-            [f"{pct:+.2f}%", f"${price:,.2f}"] for pct, price in zip(y_values, prices_raw[asset])
-        ]
-        fig.add_trace(
-            go.Scatter(
-                x=timestamps,
-                y=y_values.to_numpy(),
-                customdata=customdata,
-                line=dict(width=3, color=next(colors)),
-                name=asset,
-                xaxis="x2",
-                yaxis="y2",
-                hovertemplate=(
-                    "<span style='font-family:Courier New,monospace'>"
-                    "<b>%{customdata[0]}</b> · %{customdata[1]}"
-                    "</span><br>"
-                    "<span style='font-family:Courier New,monospace'>"
-                    "<b>%{fullData.name}</b> · %{x|%d %b %Y}"
-                    "</span>"
-                    "<extra></extra>"
-                ),
-            )
+    # main plot, only the visible window since the rest of the relative change is not shown
+    kept = lttb_indices(x_numeric[window], raw_values[window], max_points)
+    main_traces = [
+        dict(
+            type="scatter",
+            x=x_values[window][kept[:, i]],
+            y=y_values[kept[:, i], i],
+            customdata=raw_values[window][kept[:, i], i],
+            line=dict(width=3, color=color),
+            name=asset,
+            xaxis="x2",
+            yaxis="y2",
+            hovertemplate=HOVERTEMPLATE,
         )
+        for i, (asset, color) in enumerate(zip(prices.columns, colors))
+    ]
+
+    return rangeslider_traces, main_traces
+
+
+@metrics.timed("figure_build_seconds")
+def plot_prices(
+    timestamps: pd.DatetimeIndex,
+    prices: pd.DataFrame,
+    prices_raw: pd.DataFrame,
+    rolling_changes: pd.DataFrame,
+    idx_range: tuple[int, int],
+) -> dict[str, Any]:
+    idx0, idx1 = idx_range
+    date_range = [format_timestamp(timestamps[idx0]), format_timestamp(timestamps[idx1])]
+    rangeslider_traces, main_traces = plot_traces(
+        timestamps, prices, prices_raw, rolling_changes, idx_range
+    )
 
     # configure axes
-    xaxis1_dict = dict(rangeslider=dict(visible=True, thickness=0.1), tickangle=-30, nticks=20)
-    xaxis2_dict = dict(matches="x1", showticklabels=False, nticks=20, showgrid=True)
-    xaxis1_dict["range"] = date_range  # type: ignore
-    xaxis2_dict["range"] = date_range  # type: ignore
+    # date axes, so that the browser can rescale them with millisecond timestamps
+    xaxis1_dict = dict(
+        type="date",
+        rangeslider=dict(visible=True, thickness=0.1),
+        tickangle=-30,
+        nticks=20,
+        range=date_range,
+    )
+    xaxis2_dict = dict(
+        type="date",
+        matches="x",
+        showticklabels=False,
+        nticks=20,
+        showgrid=True,
+        range=date_range,
+    )
     yaxis1_dict = dict(showticklabels=False)
     yaxis2_dict = dict(
         autorange=True,
-        title="relative price change",
+        title=dict(text="relative price change"),
         nticks=12,
         tickformat="+d",
         ticksuffix="%",
@@ -192,9 +279,9 @@ def plot_prices(
         ticks="outside",
     )
 
-    fig.update_layout(
-        xaxis1=xaxis1_dict,
-        yaxis1=yaxis1_dict,
+    layout = dict(
+        xaxis=xaxis1_dict,
+        yaxis=yaxis1_dict,
         xaxis2=xaxis2_dict,
         yaxis2=yaxis2_dict,
         yaxis3=yaxis3_dict,
@@ -209,8 +296,46 @@ def plot_prices(
             yanchor="bottom",
         ),
         margin=dict(t=50, b=10),
-        template="plotly",
+        template=get_plotly_template(),
+        height=600,
+    )
+
+    return dict(data=rangeslider_traces + main_traces, layout=layout)
+
+
+def plot_correlations(tickers: list[str], correlation: np.ndarray) -> dict[str, Any]:
+    """Return a heatmap of the correlation matrix of the tickers as a plain dict figure."""
+    heatmap = dict(
+        type="heatmap",
+        x=tickers,
+        y=tickers,
+        z=correlation,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        texttemplate="%{z:.2f}",
+        hovertemplate="%{y} · %{x}: %{z:.2f}<extra></extra>",
+        showscale=False,
+    )
+    layout = dict(
+        title=dict(text="correlation"),
+        xaxis=dict(side="top", tickangle=-30),
+        yaxis=dict(autorange="reversed"),
+        font=dict(family="Courier New, Monospace", size=14, weight="bold"),
+        margin=dict(t=100, b=10, l=60, r=10),
+        template=get_plotly_template(),
         height=600,
     )
+    return dict(data=[heatmap], layout=layout)
 
-    return fig
+
+def plot_placeholder(text: str = "Loading prices...") -> dict[str, Any]:
+    """Return an empty figure with a message, shown until the initial views are ready."""
+    layout = dict(
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        annotations=[dict(text=text, xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)],
+        font=dict(family="Courier New, Monospace", size=14, weight="bold"),
+        height=600,
+    )
+    return dict(data=[], layout=layout)
@@ -1,6 +1,8 @@
+import base64
 import re
 from collections.abc import Sequence
 from datetime import timedelta
+from functools import cache
 from typing import Any
 
 import numpy as np
@@ -13,6 +15,12 @@ def normalize_ticker_symbol(ticker_input: str) -> str:
     return re.sub(r"[^A-Z0-9]", "", ticker_input.upper())
 
 
+def normalize_tickers(tickers: Sequence[Any] | None) -> list[str]:
+    """Normalize client-supplied tickers, dropping empty and duplicate symbols."""
+    normalized = (normalize_ticker_symbol(t) for t in tickers or [] if isinstance(t, str))
+    return list(dict.fromkeys(t for t in normalized if t))
+
+
 def get_available_tickers() -> list[str]:
     """This list is too limited, I opted for any input + validation in the app."""
     nasdaq_url = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
@@ -23,6 +31,20 @@ def get_available_tickers() -> list[str]:
     return all_tickers
 
 
+@cache
+def get_symbol_directory() -> frozenset[str]:
+    """Return normalized symbols of all listed tickers, downloaded once per process."""
+    return frozenset(normalize_ticker_symbol(ticker) for ticker in get_available_tickers())
+
+
+def format_timestamp(timestamp: Any) -> str:
+    """Format a timestamp as a date, with the time of day for intraday bars."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp == timestamp.normalize():
+        return timestamp.strftime("%Y-%m-%d")
+    return timestamp.strftime("%Y-%m-%d %H:%M")
+
+
 def date_to_idx_range(timestamps: pd.DatetimeIndex, date_range: Sequence[Any]) -> tuple[int, int]:
     if all(date_range):
         idx0, idx1 = timestamps.get_indexer(date_range, method="nearest")
@@ -37,8 +59,8 @@ def get_date_range(figure_layout: dict[str, Any]) -> Sequence[str | None]:
     if "xaxis2" in figure_layout and figure_layout["xaxis2"].get("range"):
         date_range = figure_layout["xaxis2"]["range"]
     # if not found, check xaxis1
-    elif "xaxis1" in figure_layout and figure_layout["xaxis1"].get("range"):
-        date_range = figure_layout["xaxis1"]["range"]
+    elif "xaxis" in figure_layout and figure_layout["xaxis"].get("range"):
+        date_range = figure_layout["xaxis"]["range"]
     # else:
     #     print(figure_layout)
     return date_range
@@ -51,14 +73,12 @@ def adjust_date_range(
     date_range: Sequence[str | None] | None = None,
 ) -> Sequence[str]:
     if not date_range or triggered_id == "btn-ytd":
-        start_date = timestamps[0].strftime("%Y-%m-%d")
-        end_date = timestamps[-1].strftime("%Y-%m-%d")
+        end_date = format_timestamp(timestamps[-1])
     else:
-        start_date, end_date = date_range
-    start_date = max(
-        parser.parse(end_date) - timedelta(days=offset_days),
-        timestamps[0],
-    ).strftime("%Y-%m-%d")
+        end_date = str(date_range[1])
+    start_date = format_timestamp(
+        max(parser.parse(end_date) - timedelta(days=offset_days), timestamps[0])
+    )
     return [start_date, end_date]
 
 
@@ -67,3 +87,10 @@ def normalize_prices(prices: pd.DataFrame, date_range: Sequence[Any]) -> pd.Data
     prices_normalized = np.nan * prices
     prices_normalized.loc[date0:date1] = prices[date0:date1] / prices.loc[date0] - 1
     return prices_normalized
+
+
+def encode_array(values: Any, dtype: str = "float64") -> str:
+    """Encode values as base64 of little-endian typed array bytes for the browser."""
+    return base64.b64encode(
+        np.asarray(values, dtype=np.dtype(dtype).newbyteorder("<")).tobytes()
+    ).decode()
@@ -0,0 +1,24 @@
+from src.cache import TTL_SWEEP_MIN_SIZE, TTLCache
+
+
+def test_ttl_entries_expire(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("src.cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache()
+    cache.set("a", 1, ttl=10)
+    assert cache.get("a") == 1
+    now[0] = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_expired_entries_are_swept_on_set(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("src.cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[int, bool] = TTLCache()
+    for t in range(100):
+        # keys are never looked up again, so only the sweeps can drop them
+        for key in range(100 * t, 100 * (t + 1)):
+            cache.set(key, True, ttl=1)
+        now[0] += 1
+        assert len(cache) < 2 * max(TTL_SWEEP_MIN_SIZE, 100)
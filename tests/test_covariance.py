@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.covariance import CovarianceEngine
+
+
+@pytest.fixture
+def returns():
+    return np.random.default_rng(0).standard_normal((500, 4)) * 0.01
+
+
+def expected(returns, idx0, idx1):
+    return np.cov(returns[idx0 + 1 : idx1 + 1], rowvar=False)
+
+
+def test_direct_streamed_and_prefix_paths(returns):
+    engine = CovarianceEngine(returns, max_streaming_rows=10)
+
+    np.testing.assert_allclose(engine.covariance(100, 300), expected(returns, 100, 300))
+    assert engine.computed == 1
+
+    # moved by a few rows at both ends, updated from the previous window
+    np.testing.assert_allclose(engine.covariance(97, 305), expected(returns, 97, 305))
+    np.testing.assert_allclose(engine.covariance(99, 301), expected(returns, 99, 301))
+    assert engine.streamed == 2
+
+    # moved far, differenced from the prefix sums
+    np.testing.assert_allclose(engine.covariance(0, 499), expected(returns, 0, 499))
+    np.testing.assert_allclose(engine.covariance(250, 400), expected(returns, 250, 400))
+    assert engine.differenced == 2
+    assert engine.computed == 1
+
+
+def test_negative_indices_wrap(returns):
+    engine = CovarianceEngine(returns)
+    np.testing.assert_allclose(engine.covariance(-200, -1), expected(returns, 300, 499))
+
+
+def test_short_window_is_nan(returns):
+    engine = CovarianceEngine(returns)
+    assert np.isnan(engine.covariance(10, 11)).all()
+
+
+def test_correlation(returns):
+    engine = CovarianceEngine(returns)
+    np.testing.assert_allclose(
+        engine.correlation(50, 450), np.corrcoef(returns[51:451], rowvar=False)
+    )
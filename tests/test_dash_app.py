@@ -0,0 +1,149 @@
+import gzip
+import json
+
+import pytest
+from plotly.io.json import to_json_plotly
+
+from src.cache import LRUCache
+from src.dash_app import NormalizedAssetPricesApp
+from src.providers import LocalProvider
+from src.store import PriceStore
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    store = PriceStore(str(tmp_path_factory.mktemp("prices")))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("src.dash_app.APP_WARM_START", False)
+        mp.setattr("src.dash_app.get_provider", LocalProvider)
+        mp.setattr("src.dash_app.get_price_store", lambda provider_name: store)
+        yield NormalizedAssetPricesApp(["QQQ", "SPY", "VTI", "VT"], "2022-01-01")
+
+
+@pytest.fixture
+def client(app):
+    return app.app.server.test_client()
+
+
+def initial_state(app):
+    figure = json.loads(to_json_plotly(app.initial_views["figure"]))
+    return figure, app.initial_views["raw_prices"]
+
+
+def update_tickers(client, tickers, figure, raw_prices, headers=None):
+    """Post a ticker selection change the way the browser does, return the response."""
+    deps = client.get("/_dash-dependencies").json
+    dep = next(
+        d
+        for d in deps
+        if d["inputs"] == [{"id": "ticker-selection", "property": "value"}]
+        and "raw-prices.data" in d["output"]
+    )
+    outputs = [
+        dict(zip(("id", "property"), output.split(".", 1)))
+        for output in dep["output"].strip(".").split("...")
+    ]
+    payload = {
+        "output": dep["output"],
+        "outputs": outputs,
+        "inputs": [{"id": "ticker-selection", "property": "value", "value": tickers}],
+        "state": [
+            {"id": "plotly-normalized-asset-prices", "property": "figure", "value": figure},
+            {"id": "raw-prices", "property": "data", "value": raw_prices},
+        ],
+        "changedPropIds": ["ticker-selection.value"],
+    }
+    return client.post("/_dash-update-component", json=payload, headers=headers or {})
+
+
+def test_repeat_views_are_served_from_cache(app, client):
+    figure, raw_prices = initial_state(app)
+    app.views = LRUCache(app.views.maxsize, "views")
+
+    first = update_tickers(client, ["VT", "QQQ"], figure, raw_prices)
+    assert first.status_code == 200
+    assert len(app.views) == 1
+    response = first.json["response"]
+    assert list(response) == ["plotly-normalized-asset-prices", "raw-prices"]
+    assert len(response["plotly-normalized-asset-prices"]["figure"]["data"]) == 4
+    assert response["raw-prices"]["data"]["tickers"] == ["VT", "QQQ"]
+
+    second = update_tickers(client, ["VT", "QQQ"], figure, raw_prices, {"Accept-Encoding": "gzip"})
+    assert len(app.views) == 1
+    assert second.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(second.data) == first.data
+
+
+def test_view_key_follows_the_cached_prices(app):
+    tickers = ["VT", "QQQ"]
+    date_range = app.initial_views["visible_range"]
+    app.get_prices(tickers)
+    key = app._view_key(tickers, date_range)
+    assert key is not None
+    assert app._view_key(tickers, date_range) == key
+    assert app._view_key(tickers[::-1], date_range) != key
+
+    series, covered = app.cache.load("VT")
+    app.cache.save("VT", series, covered)
+    assert app._view_key(tickers, date_range) != key
+
+
+def test_panels_are_shared_until_prices_change(app):
+    tickers = ["QQQ", "VT", "SPY"]
+    panel = app.get_panel(tickers)
+    panel.percentage_changes
+    assert app.get_panel(tickers) is panel
+    assert app.get_panel(tickers[:2]) is not panel
+
+    series, covered = app.cache.load("VT")
+    app.cache.save("VT", series, covered)
+    assert app.get_panel(tickers) is not panel
+
+
+def apply_patch(value, patch):
+    """Apply the operations of a serialized Dash Patch to a copy of the value."""
+    value = json.loads(json.dumps(value))
+    for operation in patch["operations"]:
+        *path, last = operation["location"]
+        target = value
+        for key in path:
+            target = target[key]
+        params = operation["params"]
+        if operation["operation"] == "Assign":
+            target[last] = params["value"]
+        elif operation["operation"] == "Delete":
+            del target[last]
+        elif operation["operation"] == "Insert":
+            target[last].insert(params["index"], params["value"])
+        elif operation["operation"] == "Append":
+            target[last].append(params["value"])
+        elif operation["operation"] == "Remove":
+            target[last].remove(params["value"])
+        else:
+            raise AssertionError(operation)
+    return value
+
+
+def assert_patched_like_rebuilt(client, tickers, figure, raw_prices):
+    response = update_tickers(client, tickers, figure, raw_prices).json["response"]
+    figure_patch = response["plotly-normalized-asset-prices"]["figure"]
+    raw_prices_patch = response["raw-prices"]["data"]
+    assert "__dash_patch_update" in figure_patch
+    assert "__dash_patch_update" in raw_prices_patch
+
+    rebuilt = update_tickers(client, tickers, figure, None).json["response"]
+    patched_figure = apply_patch(figure, figure_patch)
+    rebuilt_figure = rebuilt["plotly-normalized-asset-prices"]["figure"]
+    assert len(patched_figure["data"]) == len(rebuilt_figure["data"]) == 2 * len(tickers)
+    assert patched_figure["data"] == rebuilt_figure["data"]
+    assert apply_patch(raw_prices, raw_prices_patch) == rebuilt["raw-prices"]["data"]
+
+
+def test_added_ticker_is_patched_in(app, client):
+    figure, raw_prices = initial_state(app)
+    assert_patched_like_rebuilt(client, ["QQQ", "SPY", "VTI", "VT", "IWM"], figure, raw_prices)
+
+
+def test_removed_ticker_is_patched_out(app, client):
+    figure, raw_prices = initial_state(app)
+    assert_patched_like_rebuilt(client, ["QQQ", "VTI", "VT"], figure, raw_prices)
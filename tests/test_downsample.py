@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.downsample import lttb_indices
+
+
+def lttb_reference(x, y, n_out):
+    """Largest-Triangle-Three-Buckets of a single series, one point at a time."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    kept = [0]
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(np.floor(i * every)) + 1, int(np.floor((i + 1) * every)) + 1
+        next_lo, next_hi = hi, min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1001, 37), (50, 3), (51, 50)])
+def test_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 1000, n))
+    y = rng.standard_normal((n, 3)).cumsum(axis=0)
+    indices = lttb_indices(x, y, n_out)
+    assert indices.shape == (n_out, 3)
+    for column in range(3):
+        np.testing.assert_array_equal(indices[:, column], lttb_reference(x, y[:, column], n_out))
+
+
+def test_keeps_endpoints():
+    x = np.arange(500, dtype=np.float64)
+    y = np.sin(x / 10)
+    indices = lttb_indices(x, y, 20)
+    assert indices[0, 0] == 0
+    assert indices[-1, 0] == 499
+    assert np.all(np.diff(indices[:, 0]) > 0)
+
+
+@pytest.mark.parametrize("n_out", [10, 100, 2])
+def test_returns_all_rows_when_short(n_out):
+    x = np.arange(10, dtype=np.float64)
+    indices = lttb_indices(x, np.ones((10, 2)), n_out)
+    np.testing.assert_array_equal(indices, np.repeat(np.arange(10)[:, None], 2, axis=1))
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.prices import Prices
+from src.providers import LocalProvider
+from src.sessions import trading_index
+from src.stats import RISK_STATS, risk_stats
+from src.store import PriceStore
+
+
+class FlakyProvider(LocalProvider):
+    """Local prices that come back empty while `failing` is set, like a failed download,
+    and raise while `raising` is set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failing = False
+        self.raising = False
+
+    def download(self, tickers, start, end, interval="1d"):
+        if self.raising:
+            raise ConnectionError("upstream down")
+        if self.failing:
+            return pd.DataFrame(columns=tickers, dtype=float)
+        return super().download(tickers, start, end, interval)
+
+
+@pytest.fixture
+def provider():
+    return FlakyProvider()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path))
+
+
+def test_empty_tail_is_fetched_again(provider, store):
+    prices = Prices(["AAA"], "2024-01-01", provider, store)
+    start = pd.Timestamp("2024-01-02")
+    prices._read_through(["BBB"], start, pd.Timestamp("2024-03-01"))
+    assert store.load("BBB")[1] == (start, pd.Timestamp("2024-03-01"))
+
+    provider.failing = True
+    data = prices._read_through(["BBB"], start, pd.Timestamp("2024-03-20"))
+    assert data.index[-1] == pd.Timestamp("2024-02-29")
+    assert store.load("BBB")[1] == (start, pd.Timestamp("2024-03-01"))
+
+    provider.failing = False
+    data = prices._read_through(["BBB"], start, pd.Timestamp("2024-03-20"))
+    tail = provider.download(["BBB"], pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-20"))
+    pd.testing.assert_series_equal(data["BBB"]["2024-03-01":], tail["BBB"], check_freq=False)
+    assert store.load("BBB")[1] == (start, pd.Timestamp("2024-03-20"))
+
+
+class SplitProvider(LocalProvider):
+    """Local prices rescaled by `factor`, like adjusted closes after a split."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.factor = 1.0
+
+    def download(self, tickers, start, end, interval="1d"):
+        return self.factor * super().download(tickers, start, end, interval)
+
+
+def test_rescaled_history_is_fetched_again(store):
+    provider = SplitProvider()
+    prices = Prices(["AAA"], "2024-01-01", provider, store)
+    start, end = pd.Timestamp("2024-01-02"), pd.Timestamp("2024-03-20")
+    prices._read_through(["BBB"], start, pd.Timestamp("2024-03-01"))
+
+    provider.factor = 0.1
+    data = prices._read_through(["BBB"], start, end)
+    expected = provider.download(["BBB"], start, end)
+    pd.testing.assert_series_equal(data["BBB"], expected["BBB"], check_freq=False)
+    pd.testing.assert_series_equal(store.load("BBB")[0], expected["BBB"], check_freq=False)
+
+
+METRICS = ["prices_normalized", "percentage_changes", "cumulative_changes", "cumulative_squares"]
+
+
+def assert_same_prices(prices, expected):
+    assert prices.date_range.equals(expected.date_range)
+    pd.testing.assert_frame_equal(prices.prices_raw, expected.prices_raw)
+    for metric in METRICS:
+        pd.testing.assert_frame_equal(prices.get_metric(metric), expected.get_metric(metric))
+    pd.testing.assert_frame_equal(prices.rolling_changes, expected.rolling_changes)
+
+
+@pytest.fixture
+def yesterday(monkeypatch):
+    """Build the time index without the last rows, as it was a few days ago."""
+    monkeypatch.setattr(
+        "src.prices.trading_index", lambda start, interval: trading_index(start, interval)[:-3]
+    )
+    return monkeypatch
+
+
+def test_refresh_appends_tail(provider, store, yesterday):
+    prices = Prices(["AAA", "BBB"], "2023-01-01", provider, store)
+    for metric in METRICS:
+        prices.get_metric(metric)
+    prices.rolling_changes
+    yesterday.undo()
+
+    prices.refresh()
+    assert_same_prices(prices, Prices(["AAA", "BBB"], "2023-01-01", provider, store))
+
+
+def test_failed_refresh_keeps_prices(provider, store, yesterday):
+    prices = Prices(["AAA", "BBB"], "2023-01-01", provider, store)
+    prices.rolling_changes
+    date_range, prices_raw = prices.date_range, prices.prices_raw
+    yesterday.undo()
+
+    provider.raising = True
+    with pytest.raises(ConnectionError):
+        prices.refresh()
+    assert prices.date_range.equals(date_range)
+    pd.testing.assert_frame_equal(prices.prices_raw, prices_raw)
+    assert np.isfinite(prices.rolling_changes.to_numpy()).all()
+
+    provider.raising = False
+    prices.refresh()
+    assert_same_prices(prices, Prices(["AAA", "BBB"], "2023-01-01", provider, store))
+
+
+@pytest.mark.parametrize("idx_range", [(0, -1), (100, 400), (-60, -1), (10, 12)])
+def test_window_stats_match_the_rows(provider, store, idx_range):
+    prices = Prices(["AAA", "BBB", "SPY"], "2022-01-01", provider, store)
+    idx0, idx1 = (idx % len(prices.date_range) for idx in idx_range)
+    changes = prices.percentage_changes.iloc[idx0 + 1 : idx1 + 1]
+    prices_raw = prices.prices_raw
+
+    stats = prices.get_window_stats(idx_range)
+    np.testing.assert_allclose(stats["sum"], changes.sum(), atol=1e-12)
+    np.testing.assert_allclose(stats["mean"], changes.mean(), atol=1e-12)
+    np.testing.assert_allclose(stats["volatility"], changes.std(), rtol=1e-6)
+    np.testing.assert_allclose(stats["return"], prices_raw.iloc[idx1] / prices_raw.iloc[idx0] - 1)
+
+    # prefix sums of the changes agree with the stats summed over the rows
+    rows = slice(idx0, idx1 + 1)
+    risk = prices.get_risk_stats(idx_range, "SPY")
+    expected = risk_stats(
+        prices_raw.to_numpy()[rows], prices.date_range[rows], prices_raw["SPY"].to_numpy()[rows]
+    )
+    for stat in RISK_STATS:
+        # changes are taken against slightly offset prices, which shifts the mean a little
+        tolerance = {"atol": 1e-2} if stat == "sharpe" else {"rtol": 1e-4}
+        np.testing.assert_allclose(risk[stat], expected[stat], **tolerance)
+
+
+def test_intraday_stats_use_daily_closes(provider, store):
+    prices = Prices(["AAA", "SPY"], "2024-01-01", provider, store, interval="5m")
+    n_rows = len(prices.date_range)
+    idx_range = (n_rows - 2000, n_rows - 1)
+    window = prices.prices_raw.iloc[idx_range[0] : idx_range[1] + 1]
+    closes = window.groupby(window.index.normalize()).last()
+
+    risk = prices.get_risk_stats(idx_range, "SPY")
+    expected = risk_stats(closes.to_numpy(), closes.index, closes["SPY"].to_numpy())
+    for stat in RISK_STATS:
+        np.testing.assert_allclose(risk[stat], expected[stat])
+    assert (risk["volatility"] < 1).all()
+
+
+def test_memoized_metrics_follow_ticker_changes(provider, store):
+    prices = Prices(["AAA", "BBB"], "2023-01-01", provider, store)
+    for metric in METRICS:
+        prices.get_metric(metric)
+    prices.rolling_changes
+
+    prices.update_tickers(["CCC", "AAA"])
+    assert prices.tickers == ["CCC", "AAA"]
+    assert_same_prices(prices, Prices(["CCC", "AAA"], "2023-01-01", provider, store))
+
+    with pytest.raises(ValueError):
+        prices.get_metric("unknown")
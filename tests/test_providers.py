@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from src.providers import LocalProvider, YFinanceProvider
+
+
+@pytest.mark.parametrize(
+    "interval, start, ends",
+    [
+        ("1d", "2024-01-01", ["2024-01-10", "2024-02-10"]),
+        ("5m", "2024-01-02", ["2024-01-04", "2024-01-10"]),
+        ("60m", "2024-01-02", ["2024-01-04", "2024-01-10"]),
+    ],
+)
+def test_local_prices_do_not_depend_on_the_range(interval, start, ends):
+    provider = LocalProvider()
+    short, long = (
+        provider.download(["AAA"], pd.Timestamp(start), pd.Timestamp(end), interval)["AAA"]
+        for end in ends
+    )
+    assert not short.empty
+    pd.testing.assert_series_equal(short, long.loc[short.index], check_freq=False)
+
+
+def test_intraday_prices_close_at_daily_prices():
+    provider = LocalProvider()
+    start, end = pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-10")
+    daily = provider.download(["AAA"], start, end)["AAA"]
+    intraday = provider.download(["AAA"], start, end, "5m")["AAA"]
+    closes = intraday.groupby(intraday.index.normalize()).last()
+    pd.testing.assert_series_equal(closes, daily, check_freq=False, check_names=False)
+
+
+@pytest.mark.parametrize(
+    "error, raises",
+    [
+        ("YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')", True),
+        ("ConnectionError('Connection aborted.')", True),
+        ("YFTzMissingError('$XYZ: possibly delisted; no timezone found')", False),
+        ("YFPricesMissingError('$XYZ: possibly delisted; no price data found')", False),
+    ],
+)
+def test_yfinance_download_errors(monkeypatch, error, raises):
+    yf = pytest.importorskip("yfinance")
+
+    def download(tickers, **kwargs):
+        monkeypatch.setattr(yf.shared, "_ERRORS", {"XYZ": error})
+        return pd.DataFrame()
+
+    monkeypatch.setattr(yf, "download", download)
+    start, end = pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-10")
+    if raises:
+        with pytest.raises(RuntimeError):
+            YFinanceProvider().download(["XYZ"], start, end)
+    else:
+        assert YFinanceProvider().download(["XYZ"], start, end).empty
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src import sessions
+from src.sessions import bar_end, session_bars, trading_index
+
+
+class FakeDate(date):
+    today_value = date(2024, 3, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.today_value
+
+
+def test_trading_index_is_built_once_a_day(monkeypatch):
+    monkeypatch.setattr(sessions, "date", FakeDate)
+    FakeDate.today_value = date(2024, 3, 1)
+    index = trading_index("2024-01-01", "1d")
+    assert trading_index("2024-01-01", "1d") is index
+    assert index[-1] == pd.Timestamp("2024-03-01")
+
+    FakeDate.today_value = date(2024, 3, 4)
+    moved = trading_index("2024-01-01", "1d")
+    assert moved[-1] == pd.Timestamp("2024-03-04")
+    assert moved[:-1].equals(index)
+
+
+@pytest.mark.parametrize("interval, n_bars, last", [("5m", 78, "15:55"), ("60m", 7, "15:30")])
+def test_session_bars(interval, n_bars, last):
+    day = pd.Timestamp("2024-01-02")
+    bars = session_bars(day, day, interval)
+    assert len(bars) == n_bars
+    assert bars[0] == pd.Timestamp("2024-01-02 09:30")
+    assert bars[-1] == pd.Timestamp(f"2024-01-02 {last}")
+
+
+def test_bar_end():
+    assert bar_end(pd.Timestamp("2024-03-01"), "1d") == pd.Timestamp("2024-03-04")
+    assert bar_end(pd.Timestamp("2024-03-01 15:55"), "5m") == pd.Timestamp("2024-03-01 16:00")
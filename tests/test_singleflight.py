@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+
+def test_do_returns_result():
+    flight: SingleFlight[str] = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.stats() == {"hits": 0, "misses": 1, "coalesced": 0}
+
+
+def test_waiters_receive_leader_error():
+    flight: SingleFlight[str] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing(keys):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    errors = []
+
+    def lead():
+        with pytest.raises(RuntimeError):
+            flight.do_batch(["a"], failing)
+
+    def wait():
+        try:
+            flight.do("a", lambda: pytest.fail("waiter must not call fn"))
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    while flight.coalesced == 0:
+        pass
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert [str(e) for e in errors] == ["provider down"]
+    assert flight.stats() == {"hits": 0, "misses": 1, "coalesced": 1}
+    # nothing is left in flight after the error
+    assert flight.do("a", lambda: 2) == 2
+
+
+def test_partially_overlapping_batches():
+    flight: SingleFlight[str] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(keys):
+        calls.append(sorted(keys))
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return {key: key.upper() for key in keys}
+
+    results = {}
+    leader = threading.Thread(
+        target=lambda: results.update(first=flight.do_batch(["a", "b"], fetch))
+    )
+    leader.start()
+    assert started.wait(5)
+    second = threading.Thread(
+        target=lambda: results.update(second=flight.do_batch(["b", "c"], fetch))
+    )
+    second.start()
+    while flight.coalesced == 0:
+        pass
+    release.set()
+    leader.join(5)
+    second.join(5)
+
+    assert calls == [["a", "b"], ["c"]]
+    assert results == {"first": {"a": "A", "b": "B"}, "second": {"b": "B", "c": "C"}}
+    assert flight.stats() == {"hits": 0, "misses": 3, "coalesced": 1}
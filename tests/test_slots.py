@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.slots import SlotArray
+
+
+def test_set_take_and_discard():
+    array = SlotArray(4)
+    array.set("a", np.arange(4.0))
+    array.set("b", np.arange(4.0) + 10)
+    array.set("c", np.arange(4.0) + 20)
+    np.testing.assert_array_equal(array.take(["c", "a"]), [[20, 0], [21, 1], [22, 2], [23, 3]])
+    np.testing.assert_array_equal(array.take(["b"], slice(1, 3))[:, 0], [11, 12])
+    assert len(array) == 3 and "b" in array
+
+    values = array.values
+    array.discard("b")
+    assert "b" not in array
+    # the freed slot is reused without moving the other series
+    array.set("d", np.full(4, 7.0))
+    assert array.values is values
+    np.testing.assert_array_equal(array.take(["a", "c", "d"])[0], [0, 20, 7])
+
+
+def test_grows_by_doubling():
+    array = SlotArray(3)
+    for i in range(5):
+        array.set(str(i), np.full(3, float(i)))
+    assert array.values.shape == (8, 3)
+    np.testing.assert_array_equal(array.take([str(i) for i in range(5)])[0], range(5))
+
+
+def test_resize_keeps_rows():
+    array = SlotArray(3)
+    array.set("a", np.array([1.0, 2.0, 3.0]))
+    array.resize(5)
+    assert array.n_rows == 5
+    np.testing.assert_array_equal(array.get("a")[:3], [1, 2, 3])
+    array.resize(2)
+    np.testing.assert_array_equal(array.get("a"), [1, 2])
+
+
+def test_get_is_writable_view():
+    array = SlotArray(3, "float32")
+    array.set("a", np.zeros(3))
+    array.get("a")[1:] = 5
+    np.testing.assert_array_equal(array.take(["a"])[:, 0], [0, 5, 5])
+    assert array.nbytes == array.values.nbytes
+
+    array.clear()
+    assert len(array) == 0
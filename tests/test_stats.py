@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stats import RISK_STATS, SECONDS_PER_YEAR, risk_stats
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(1)
+    timestamps = pd.date_range("2020-01-01", periods=600, freq="B")
+    prices = 100 * np.exp(rng.normal(3e-4, 1e-2, (600, 3)).cumsum(axis=0))
+    return prices, timestamps
+
+
+def reference(prices, timestamps, benchmark, risk_free_rate=0.0):
+    """Statistics of one column at a time, with pandas."""
+    years = (timestamps[-1] - timestamps[0]).total_seconds() / SECONDS_PER_YEAR
+    benchmark_returns = pd.Series(benchmark).pct_change().dropna()
+    stats = {stat: [] for stat in RISK_STATS}
+    for column in prices.T:
+        series = pd.Series(column)
+        returns = series.pct_change().dropna()
+        rows_per_year = len(returns) / years
+        volatility = returns.std() * np.sqrt(rows_per_year)
+        stats["cagr"].append((column[-1] / column[0]) ** (1 / years) - 1)
+        stats["volatility"].append(volatility)
+        stats["sharpe"].append((returns.mean() * rows_per_year - risk_free_rate) / volatility)
+        stats["max_drawdown"].append((series / series.cummax() - 1).min())
+        stats["beta"].append(returns.cov(benchmark_returns) / benchmark_returns.var())
+        stats["correlation"].append(returns.corr(benchmark_returns))
+        stats["best"].append(returns.max())
+        stats["worst"].append(returns.min())
+    return stats
+
+
+@pytest.mark.parametrize("risk_free_rate", [0.0, 0.02])
+def test_matches_reference(panel, risk_free_rate):
+    prices, timestamps = panel
+    stats = risk_stats(prices, timestamps, prices[:, 0], risk_free_rate)
+    expected = reference(prices, timestamps, prices[:, 0], risk_free_rate)
+    for stat in RISK_STATS:
+        np.testing.assert_allclose(stats[stat], expected[stat], rtol=1e-9, err_msg=stat)
+    np.testing.assert_allclose(stats["beta"][0], 1.0)
+
+
+def test_moments_replace_the_row_sums(panel):
+    prices, timestamps = panel
+    returns = prices[1:] / prices[:-1] - 1
+    moments = (prices[-1] / prices[0] - 1, returns.mean(axis=0), returns.std(axis=0, ddof=1))
+    stats = risk_stats(prices, timestamps, prices[:, 1], moments=moments)
+    expected = risk_stats(prices, timestamps, prices[:, 1])
+    for stat in RISK_STATS:
+        np.testing.assert_allclose(stats[stat], expected[stat], rtol=1e-9, err_msg=stat)
+
+
+def test_short_windows_are_nan(panel):
+    prices, timestamps = panel
+    stats = risk_stats(prices[:2], timestamps[:2], prices[:2, 0])
+    assert all(np.isnan(stats[stat]).all() for stat in RISK_STATS)
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.store import PriceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path))
+
+
+def test_save_load_round_trip(store):
+    index = pd.date_range("2024-01-01", periods=10, freq="B")
+    series = pd.Series(np.linspace(100.0, 110.0, 10), index=index, name="SPY")
+    covered = (pd.Timestamp("2023-12-30"), pd.Timestamp("2024-01-15"))
+    store.save("SPY", series, covered)
+
+    loaded, loaded_covered = store.load("SPY")
+    pd.testing.assert_series_equal(loaded, series, check_freq=False)
+    assert loaded_covered == covered
+
+
+def test_load_missing_ticker(store):
+    assert store.load("SPY") is None
+    assert store.load("SPY", interval="1h") is None
+
+
+def test_intervals_are_stored_separately(store):
+    index = pd.date_range("2024-01-02 09:30", periods=3, freq="h")
+    series = pd.Series([1.0, 2.0, 3.0], index=index, name="SPY")
+    store.save("SPY", series, (index[0], index[-1]), interval="1h")
+    assert store.load("SPY") is None
+    assert store.load("SPY", interval="1h") is not None
+
+
+@pytest.mark.parametrize("ticker", ["../SPY", "SPY/..", "/etc/passwd", "spy", ""])
+def test_invalid_symbols_are_rejected(store, ticker):
+    assert store.load(ticker) is None
+    with pytest.raises(ValueError):
+        with store.lock([ticker]):
+            pass
+
+
+def test_lock_is_exclusive(store):
+    inside = 0
+    overlaps = []
+
+    def work():
+        nonlocal inside
+        with store.lock(["SPY", "QQQ"]):
+            inside += 1
+            overlaps.append(inside)
+            time.sleep(0.01)
+            inside -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert overlaps == [1, 1, 1, 1]
+
+
+def test_unused_lock_files_are_removed(store):
+    with store.lock(["TYPO"]):
+        pass
+    assert not os.listdir(store.root)
+
+    series = pd.Series([1.0], index=pd.DatetimeIndex(["2024-01-02"]), name="SPY")
+    with store.lock(["SPY"]):
+        store.save("SPY", series, (series.index[0], series.index[0]))
+    assert any(name.endswith(".lock") for name in os.listdir(store.root))